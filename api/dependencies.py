@@ -3,9 +3,14 @@ from functools import lru_cache
 from fastapi import Depends
 
 from api.services import ChatService
-from clients.llm import DeepseekLLMClient, OpenAILLMClient
-from clients.search import BochaSearchClient
+from clients.base import PageCache
+from clients.llm import DeepseekLLMClient, FailoverLLMClient, OpenAILLMClient
+from clients.search import BingSearchClient, BochaSearchClient, CachedSearchClient
+from core.analysis_cache import AnalysisCache
 from core.assistant import Assistant
+from core.classifier import DecisionLog, LinearModel, SearchNeedClassifier
+from core.context_packer import ContextPacker
+from utils.cache import MemoryCache, SQLiteCache
 from utils.config import settings
 
 
@@ -25,9 +30,89 @@ def get_assistant() -> Assistant:
         temperature=settings.ANSWER_LLM_TEMPERATURE,
         is_reasoning=True,
     )
+    if settings.ANSWER_FALLBACK_LLM_BASE_URL:
+        fallback_llm = OpenAILLMClient(
+            api_key=settings.ANSWER_FALLBACK_LLM_API_KEY,
+            base_url=settings.ANSWER_FALLBACK_LLM_BASE_URL,
+            model=settings.ANSWER_FALLBACK_LLM_MODEL,
+            temperature=settings.ANSWER_LLM_TEMPERATURE,
+            is_reasoning=settings.ANSWER_FALLBACK_LLM_IS_REASONING,
+        )
+        answer_llm = FailoverLLMClient([answer_llm, fallback_llm], hedge_delay=settings.ANSWER_LLM_HEDGE_DELAY or None)
 
-    search_client = BochaSearchClient(settings.BOCHA_API_KEY)
-    return Assistant(analysis_llm, answer_llm, search_client)
+    page_cache = None
+    if settings.PAGE_CACHE_SIZE > 0:
+        if settings.PAGE_CACHE_PATH:
+            cache = SQLiteCache(settings.PAGE_CACHE_PATH, settings.PAGE_CACHE_SIZE, settings.PAGE_CACHE_MAX_AGE)
+        else:
+            cache = MemoryCache(settings.PAGE_CACHE_SIZE, settings.PAGE_CACHE_MAX_AGE)
+        page_cache = PageCache(cache, settings.PAGE_CACHE_TTL, settings.PAGE_CACHE_MAX_AGE)
+
+    if settings.SEARCH_BACKEND == "bing":
+        search_client = BingSearchClient(
+            max_concurrent=settings.BING_MAX_PAGES,
+            page_cache=page_cache,
+            max_document_bytes=settings.DOCUMENT_MAX_BYTES,
+            pdf_max_pages=settings.PDF_MAX_PAGES,
+        )
+    else:
+        search_client = BochaSearchClient(
+            settings.BOCHA_API_KEY,
+            timeout=settings.BOCHA_TIMEOUT,
+            pool_size=settings.HTTP_POOL_SIZE,
+            pool_size_per_host=settings.HTTP_POOL_SIZE_PER_HOST,
+            page_cache=page_cache,
+            max_document_bytes=settings.DOCUMENT_MAX_BYTES,
+            pdf_max_pages=settings.PDF_MAX_PAGES,
+        )
+    if settings.SEARCH_CACHE_SIZE > 0:
+        if settings.SEARCH_CACHE_PATH:
+            cache = SQLiteCache(settings.SEARCH_CACHE_PATH, settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+        else:
+            cache = MemoryCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+        search_client = CachedSearchClient(search_client, cache)
+
+    analysis_cache = None
+    if settings.ANALYSIS_CACHE_SIZE > 0:
+        analysis_cache = AnalysisCache(
+            MemoryCache(settings.ANALYSIS_CACHE_SIZE, settings.ANALYSIS_CACHE_TTL),
+            similarity_threshold=settings.ANALYSIS_CACHE_SIMILARITY or None,
+            max_index_size=settings.ANALYSIS_CACHE_SIZE,
+        )
+
+    classifier = None
+    if settings.ANALYSIS_CLASSIFIER_ENABLED:
+        model = (
+            LinearModel.load(settings.ANALYSIS_CLASSIFIER_MODEL_PATH)
+            if settings.ANALYSIS_CLASSIFIER_MODEL_PATH
+            else None
+        )
+        classifier = SearchNeedClassifier(
+            model,
+            threshold=settings.ANALYSIS_CLASSIFIER_THRESHOLD,
+            shadow_rate=settings.ANALYSIS_CLASSIFIER_SHADOW_RATE,
+        )
+    decision_log = DecisionLog(settings.ANALYSIS_DECISION_LOG_PATH) if settings.ANALYSIS_DECISION_LOG_PATH else None
+
+    return Assistant(
+        analysis_llm,
+        answer_llm,
+        search_client,
+        max_concurrent_searches=settings.SEARCH_MAX_CONCURRENT,
+        search_timeout=settings.SEARCH_TIMEOUT,
+        search_deadline=settings.SEARCH_DEADLINE,
+        crawl_deadline=settings.CRAWL_DEADLINE,
+        passage_token_budget=settings.PASSAGE_TOKEN_BUDGET or None,
+        filter_batch_size=settings.FILTER_BATCH_SIZE,
+        filter_batch_token_budget=settings.FILTER_BATCH_TOKEN_BUDGET,
+        filter_batch_linger=settings.FILTER_BATCH_LINGER,
+        analysis_cache=analysis_cache,
+        context_packer=ContextPacker(settings.ANSWER_CONTEXT_TOKEN_BUDGET, settings.ANSWER_MIN_SOURCE_TOKENS),
+        speculative_answer=settings.SPECULATIVE_ANSWER,
+        speculative_search=settings.SPECULATIVE_SEARCH,
+        classifier=classifier,
+        decision_log=decision_log,
+    )
 
 
 def get_chat_service(assistant: Assistant = Depends(get_assistant)) -> ChatService:
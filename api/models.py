@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel
 
@@ -12,3 +12,6 @@ class ChatRequest(BaseModel):
     messages: List[ChatMessage]
     needs_crawler: bool = False
     needs_filter: bool = False
+    filter_mode: Literal["single", "batch"] = "single"
+    count: int = 10
+    freshness: Optional[str] = None
@@ -4,6 +4,7 @@ from fastapi.responses import StreamingResponse
 from api.dependencies import get_chat_service
 from api.models import ChatRequest
 from api.services import ChatService
+from schemas.search_options import SearchOptions
 from utils.logger import logger
 
 router = APIRouter()
@@ -17,10 +18,14 @@ async def health_check():
 @router.post("/chat")
 async def chat(request: ChatRequest, chat_service: ChatService = Depends(get_chat_service)):
     try:
-        return StreamingResponse(
-            chat_service.stream_response(request.messages, request.needs_crawler, request.needs_filter),
-            media_type="text/plain",
+        options = SearchOptions(
+            needs_crawler=request.needs_crawler,
+            needs_filter=request.needs_filter,
+            filter_mode=request.filter_mode,
+            count=request.count,
+            freshness=request.freshness,
         )
+        return StreamingResponse(chat_service.stream_response(request.messages, options), media_type="text/plain")
     except Exception as e:
         logger.error(f"API error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,8 @@
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator, List, Optional
 
 from core.assistant import Assistant
 from schemas.chat_message import ChatMessage
+from schemas.search_options import SearchOptions
 from utils.logger import logger
 
 
@@ -10,13 +11,10 @@ class ChatService:
         self.assistant = assistant
 
     async def stream_response(
-        self, messages: List[ChatMessage], needs_crawler: bool, needs_filter: bool
+        self, messages: List[ChatMessage], options: Optional[SearchOptions] = None
     ) -> AsyncGenerator[str, None]:
         try:
-            self.assistant.search_client.needs_crawler = needs_crawler
-            self.assistant.search_client.needs_filter = needs_filter
-
-            async for chunk in self.assistant.answer_question_with_stream(messages):
+            async for chunk in self.assistant.answer_question_with_stream(messages, options):
                 yield chunk + "\r\n"
 
         except Exception as e:
@@ -1,17 +1,37 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
+from api.dependencies import get_assistant
 from api.middleware import (
     global_exception_handler,
     log_request_middleware,
     validation_exception_handler,
 )
 from api.routers import router
+from utils.logger import logger
+from utils.workers import cpu_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    search_client = get_assistant().search_client
+    try:
+        await search_client.start()
+    except Exception as e:
+        logger.error(f"搜索客户端预热失败: {str(e)}")
+
+    try:
+        yield
+    finally:
+        await search_client.close()
+        cpu_pool.shutdown()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
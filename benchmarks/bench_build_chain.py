@@ -0,0 +1,49 @@
+"""
+Benchmark the per-call chain construction overhead of LLMClient._build_chain with and without the chain cache.
+
+Usage:
+    python -m benchmarks.bench_build_chain [--calls 2000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from clients.base import LLMClient
+from clients.llm.prompts import (
+    ANALYZE_SEARCH_PROMPT,
+    FILTER_RESULTS_PROMPT,
+    GENERATE_ANSWER_WITH_SEARCH_PROMPT,
+)
+
+PROMPTS = [FILTER_RESULTS_PROMPT, ANALYZE_SEARCH_PROMPT, GENERATE_ANSWER_WITH_SEARCH_PROMPT]
+
+
+async def bench(client: LLMClient, calls: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(calls):
+            await client._build_chain(PROMPTS[i % len(PROMPTS)])
+        best = min(best, time.perf_counter() - start)
+    return best / calls
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=["ok"])
+    uncached = await bench(LLMClient(llm, chain_cache_size=0), args.calls, args.repeat)
+    cached = await bench(LLMClient(llm), args.calls, args.repeat)
+    print(f"uncached: {uncached * 1e6:8.1f} us/call")
+    print(f"cached:   {cached * 1e6:8.1f} us/call")
+    print(f"speedup:  {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark the single-pass HTML cleaner against the previous regex chain of SearchClient._clean_web_content.
+
+Usage:
+    python -m benchmarks.bench_clean_web_content [--size-mb 4] [--repeat 5]
+"""
+
+import argparse
+import re
+import time
+
+from utils.html import clean_html
+
+
+def legacy_clean_web_content(content: str) -> str:
+    content = content.replace("\n", " ")
+    content = re.sub(r"<[^>]+>", "", content)
+    content = re.sub(r"<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>", "", content, flags=re.IGNORECASE)
+    content = re.sub(r"<style\b[^<]*(?:(?!<\/style>)<[^<]*)*<\/style>", "", content, flags=re.IGNORECASE)
+    content = re.sub(r"<!--.*?-->", "", content, flags=re.DOTALL)
+    content = re.sub(r"&nbsp;", " ", content)
+    content = re.sub(r"&lt;", "<", content)
+    content = re.sub(r"&gt;", ">", content)
+    content = re.sub(r"&amp;", "&", content)
+    content = re.sub(r"&quot;", '"', content)
+    content = re.sub(r"&apos;", "'", content)
+    content = re.sub(r"\s+", " ", content)
+    content = re.sub(r"<[^>]*>\s*<\/[^>]*>", "", content)
+    content = content.strip()
+    return content
+
+
+def build_page(size_mb: float) -> str:
+    block = (
+        "<div class='item'><h2>标题 &amp; Title</h2>\n"
+        "<p>这是一段用于测试的正文内容，包含&nbsp;实体&lt;和&gt;以及   多余的空白。</p>\n"
+        "<script>var data = {'a': 1, 'b': [1, 2, 3]}; function f() { return data; }</script>\n"
+        "<style>.item { color: red; margin: 0 auto; }</style>\n"
+        "<!-- comment block -->\n"
+        "<ul><li>Item one</li><li>Item two</li><li></li></ul></div>\n"
+    )
+    return f"<html><body>{block * max(1, int(size_mb * 1024 * 1024 / len(block.encode('utf-8'))))}</body></html>"
+
+
+def bench(func, content: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, content in [("html", build_page(args.size_mb)), ("text", clean_html(build_page(args.size_mb)))]:
+        size = len(content.encode("utf-8")) / 1024 / 1024
+        legacy = bench(legacy_clean_web_content, content, args.repeat)
+        current = bench(clean_html, content, args.repeat)
+        print(
+            f"{label:<5} {size:6.2f} MB  legacy {legacy * 1000:8.1f} ms  single-pass {current * 1000:8.1f} ms  "
+            f"speedup {legacy / current:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
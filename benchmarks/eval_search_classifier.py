@@ -0,0 +1,75 @@
+"""
+Evaluate the search-need pre-classifier against the analysis LLM decisions logged in ANALYSIS_DECISION_LOG_PATH.
+
+Without --model, a linear model is trained on the first part of the log and evaluated on the rest; --save stores it
+for ANALYSIS_CLASSIFIER_MODEL_PATH.
+
+Usage:
+    python -m benchmarks.eval_search_classifier --log decisions.jsonl [--model model.json] [--save model.json]
+        [--test-ratio 0.2] [--thresholds 0.8 0.9 0.95]
+"""
+
+import argparse
+import random
+from typing import Any, Dict, List
+
+from core.classifier import LinearModel, SearchNeedClassifier, read_decision_log
+
+
+def evaluate(classifier: SearchNeedClassifier, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    counts = {"total": len(records), "fast_path": 0, "correct": 0, "false_skip": 0, "false_search": 0}
+    by_source: Dict[str, List[int]] = {}
+    for record in records:
+        prediction = classifier.predict(record["question"])
+        if not prediction.confident:
+            continue
+        label = bool(record["needs_search"])
+        counts["fast_path"] += 1
+        counts["correct"] += prediction.needs_search == label
+        counts["false_skip"] += label and not prediction.needs_search
+        counts["false_search"] += prediction.needs_search and not label
+        source = by_source.setdefault(prediction.source, [0, 0])
+        source[0] += 1
+        source[1] += prediction.needs_search == label
+
+    return {
+        **counts,
+        "coverage": counts["fast_path"] / counts["total"] if counts["total"] else 0.0,
+        "accuracy": counts["correct"] / counts["fast_path"] if counts["fast_path"] else None,
+        "by_source": {source: f"{correct}/{total}" for source, (total, correct) in by_source.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", required=True, help="The decision log written by the assistant")
+    parser.add_argument("--model", help="A trained model to evaluate instead of training one")
+    parser.add_argument("--save", help="Where to save the trained model")
+    parser.add_argument("--test-ratio", type=float, default=0.2)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.9, 0.95, 0.99])
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    records = read_decision_log(args.log)
+    random.Random(args.seed).shuffle(records)
+    if args.model:
+        model, test = LinearModel.load(args.model), records
+    else:
+        split = int(len(records) * (1 - args.test_ratio))
+        train, test = records[:split], records[split:]
+        model = LinearModel.train(
+            ((record["question"], bool(record["needs_search"])) for record in train), epochs=args.epochs, seed=args.seed
+        )
+        print(f"trained on {len(train)} decisions, testing on {len(test)}")
+        if args.save:
+            model.save(args.save)
+
+    print(f"positive rate: {sum(bool(record['needs_search']) for record in test) / max(1, len(test)):.3f}")
+    print(f"rules only:     {evaluate(SearchNeedClassifier(), test)}")
+    for threshold in args.thresholds:
+        print(f"threshold {threshold:.2f}: {evaluate(SearchNeedClassifier(model, threshold), test)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from .llm_client import LLMClient
+from .page_cache import PageCache
 from .search_client import SearchClient
 
-__all__ = ["LLMClient", "SearchClient"]
+__all__ = ["LLMClient", "PageCache", "SearchClient"]
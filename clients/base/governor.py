@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, Optional
+
+from utils.config import settings
+from utils.logger import logger
+
+
+class Priority(IntEnum):
+    ANSWER = 0
+    FILTER = 1
+    ANALYSIS = 2
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1):
+        """
+        Wait until the bucket holds the requested amount, then take it.
+
+        Args:
+            amount (float, optional): The amount to take, capped at the bucket capacity. Defaults to 1.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class LLMGovernor:
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        """
+        Shared limiter for calls to one provider and model.
+
+        Args:
+            max_in_flight (int, optional): The maximum number of concurrent calls. Defaults to 16.
+            requests_per_minute (Optional[float], optional): The request rate limit. Defaults to None.
+            tokens_per_minute (Optional[float], optional): The prompt token rate limit. Defaults to None.
+        """
+        self.max_in_flight = max_in_flight
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self._in_flight = 0
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._queue_stats: Dict[Priority, Dict[str, float]] = {}
+
+    async def _acquire_slot(self, priority: Priority):
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _record_queue_time(self, priority: Priority, seconds: float):
+        stats = self._queue_stats.setdefault(priority, {"count": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the in-flight, waiting and queue time metrics.
+
+        Returns:
+            Dict[str, Any]: The metrics, with queue times in milliseconds per priority class.
+        """
+        return {
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for _, _, future in self._waiters if not future.done()),
+            "queue_ms": {
+                priority.name.lower(): {
+                    "count": int(stats["count"]),
+                    "avg": stats["total"] / stats["count"] * 1000,
+                    "max": stats["max"] * 1000,
+                }
+                for priority, stats in self._queue_stats.items()
+            },
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.ANALYSIS, tokens: int = 0) -> AsyncIterator[None]:
+        """
+        Hold one in-flight call slot, granted by priority, after the rate limits allow the call.
+
+        Args:
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANALYSIS.
+            tokens (int, optional): The estimated prompt tokens of the call. Defaults to 0.
+        """
+        start = time.monotonic()
+        await self._acquire_slot(priority)
+        try:
+            if self.requests is not None:
+                await self.requests.acquire(1)
+            if self.tokens is not None and tokens:
+                await self.tokens.acquire(tokens)
+
+            queue_time = time.monotonic() - start
+            self._record_queue_time(priority, queue_time)
+            if queue_time > 1:
+                logger.warning(f"LLM 调用排队 {queue_time:.2f}s ({priority.name.lower()}): {self.stats()}")
+            yield
+        finally:
+            self._release_slot()
+
+
+_governors: Dict[str, LLMGovernor] = {}
+
+
+def get_governor(key: str) -> LLMGovernor:
+    """
+    Get the governor shared by all clients of one provider and model, creating it from settings on first use.
+
+    Args:
+        key (str): The provider and model key.
+
+    Returns:
+        LLMGovernor: The shared governor.
+    """
+    if key not in _governors:
+        _governors[key] = LLMGovernor(
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE or None,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE or None,
+        )
+    return _governors[key]
@@ -1,4 +1,5 @@
-from typing import Any, AsyncGenerator, Dict, Optional, Type
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple, Type, Union
 
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
@@ -6,18 +7,56 @@ from langchain_core.runnables import RunnableSequence
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
 
-from utils.json import parse_result_to_json
-from utils.logger import logger
+from utils.config import settings
+from utils.json import JSONStreamParser, parse_result_to_json
+from utils.tokens import count_tokens
+
+from .governor import LLMGovernor, Priority
+from .retry import RetryPolicy
 
 
 class LLMClient:
-    def __init__(self, llm: ChatOpenAI, is_reasoning: bool = False):
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        is_reasoning: bool = False,
+        governor: Optional[LLMGovernor] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        chain_cache_size: int = 128,
+    ):
         self.llm = llm
         self.is_reasoning = is_reasoning
+        self.governor = governor or LLMGovernor(max_in_flight=1 << 16)
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=settings.LLM_MAX_RETRIES + 1,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_RETRY_MAX_DELAY,
+            deadline=settings.LLM_CALL_DEADLINE or None,
+        )
+        self.chain_cache_size = chain_cache_size
+        self._chains: OrderedDict = OrderedDict()
+
+    def _slot(self, prompt: str, priority: Priority, **kwargs: Any):
+        """
+        Hold a governor slot for one call, estimating its prompt tokens from the template and variables when the
+        governor limits tokens per minute.
+
+        Args:
+            prompt (str): The prompt template of the call.
+            priority (Priority): The priority class of the call.
+            **kwargs (Any): The variables of the call.
+
+        Returns:
+            AsyncContextManager[None]: The governor slot.
+        """
+        tokens = 0
+        if self.governor.tokens is not None:
+            tokens = count_tokens(prompt) + sum(count_tokens(str(value)) for value in kwargs.values())
+        return self.governor.slot(priority, tokens)
 
     async def _build_chain(self, system_prompt: str, **partials: Any) -> RunnableSequence:
         """
-        Build a chain with the given system prompt and partials
+        Build a chain with the given system prompt and partials, reusing the chain of recent identical calls
 
         Args:
             system_prompt (str): The system prompt to use for the chain
@@ -26,21 +65,41 @@ class LLMClient:
         Returns:
             RunnableSequence: The built chain
         """
+        try:
+            key = (system_prompt, tuple(sorted(partials.items())))
+            hash(key)
+        except TypeError:
+            key = None
+
+        if key is not None and key in self._chains:
+            self._chains.move_to_end(key)
+            return self._chains[key]
+
         prompt = ChatPromptTemplate.from_template(system_prompt).partial(**partials)
-        return prompt | self.llm
+        chain = prompt | self.llm
+        if key is not None and self.chain_cache_size > 0:
+            self._chains[key] = chain
+            if len(self._chains) > self.chain_cache_size:
+                self._chains.popitem(last=False)
+        return chain
 
-    async def _invoke_chain(self, chain: RunnableSequence, **kwargs) -> Optional[Dict[str, Any]]:
+    async def _invoke_chain(
+        self, chain: RunnableSequence, prompt: str, priority: Priority = Priority.ANALYSIS, **kwargs
+    ) -> Optional[Dict[str, Any]]:
         """
         Invoke the given chain with the given kwargs and parse the response
 
         Args:
             chain (RunnableSequence): The chain to invoke
+            prompt (str): The prompt the chain was built from
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANALYSIS.
             **kwargs (Any): The kwargs to pass to the chain
 
         Returns:
             Optional[Dict[str, Any]]: The parsed response
         """
-        response = await chain.ainvoke(kwargs)
+        async with self._slot(prompt, priority, **kwargs):
+            response = await chain.ainvoke(kwargs)
         return await self._parse_content(response.content)
 
     async def _parse_content(self, content: str) -> Optional[Dict[str, Any]]:
@@ -60,45 +119,60 @@ class LLMClient:
         if json_data is None:
             raise ValueError("Failed to parse result to json")
 
-    async def _handle_response_with_retry(self, chain: RunnableSequence, retries: int = 2, **kwargs) -> Dict[str, Any]:
+    async def _handle_response_with_retry(
+        self,
+        chain: RunnableSequence,
+        prompt: str,
+        retries: Optional[int] = None,
+        priority: Priority = Priority.ANALYSIS,
+        **kwargs,
+    ) -> Dict[str, Any]:
         """
         Handle the response with retry
 
         Args:
             chain (RunnableSequence): The chain to invoke
-            retries (int, optional): The number of retries to attempt. Defaults to 2.
+            prompt (str): The prompt the chain was built from
+            retries (Optional[int], optional): The number of attempts. Defaults to the retry policy.
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANALYSIS.
             **kwargs (Any): The kwargs to pass to the chain
 
         Returns:
-            Dict[str, Any]: The response
+            Dict[str, Any]: The response, or an empty dict if no attempt returned a parsable JSON object
         """
-        for attempt in range(retries):
-            try:
-                response = await self._invoke_chain(chain, **kwargs)
-                if response:
-                    return response
-            except Exception as e:
-                logger.error(f"Attempt {attempt + 1} failed to handle response: {e}")
-        return {}
 
-    async def generate_dict_response(self, prompt: str, retries: int = 2, **kwargs: Any) -> Dict[str, Any]:
+        async def attempt() -> Dict[str, Any]:
+            response = await self._invoke_chain(chain, prompt, priority, **kwargs)
+            if not response:
+                raise ValueError("Response is not a JSON object")
+            return response
+
+        try:
+            return await self.retry_policy.run(attempt, max_attempts=retries)
+        except ValueError:
+            return {}
+
+    async def generate_dict_response(
+        self, prompt: str, retries: Optional[int] = None, priority: Priority = Priority.ANALYSIS, **kwargs: Any
+    ) -> Dict[str, Any]:
         """
         Generate a dict response
 
         Args:
             prompt (str): The prompt to use for the chain
-            retries (int, optional): The number of retries to attempt. Defaults to 2.
+            retries (Optional[int], optional): The number of attempts. Defaults to the retry policy.
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANALYSIS.
             **kwargs (Any): The kwargs to pass to the chain
 
         Returns:
             Dict[str, Any]: The response
         """
         chain = await self._build_chain(prompt)
-        response = await self._handle_response_with_retry(chain, retries, **kwargs)
+        response = await self._handle_response_with_retry(chain, prompt, retries, priority, **kwargs)
         return response
 
     async def generate_dict_stream_response(
-        self, prompt: str, pydantic_object: Type[BaseModel], **kwargs: Any
+        self, prompt: str, pydantic_object: Type[BaseModel], priority: Priority = Priority.ANALYSIS, **kwargs: Any
     ) -> AsyncGenerator[Dict[str, Any], Any]:
         """
         Generate a dict stream response
@@ -106,6 +180,7 @@ class LLMClient:
         Args:
             prompt (str): The prompt to use for the chain
             pydantic_object (Type[BaseModel]): The pydantic object to use for the chain
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANALYSIS.
             **kwargs (Any): The kwargs to pass to the chain
 
         Returns:
@@ -117,52 +192,121 @@ class LLMClient:
         chain = await self._build_chain(prompt, format_instructions=format_instructions)
         chain = chain | parse
 
-        async for chunk in chain.astream(kwargs):
+        async def stream() -> AsyncGenerator[Dict[str, Any], Any]:
+            async with self._slot(prompt, priority, **kwargs):
+                async for chunk in chain.astream(kwargs):
+                    yield chunk
+
+        async for chunk in self.retry_policy.stream(stream):
             yield chunk
 
-    async def generate_response(self, prompt: str, **kwargs: Any) -> str:
+    async def generate_json_events(
+        self, prompt: str, priority: Priority = Priority.ANALYSIS, **kwargs: Any
+    ) -> AsyncGenerator[Tuple[Tuple[Union[str, int], ...], Any], Any]:
+        """
+        Stream a JSON response and yield each value as soon as it is complete
+
+        Args:
+            prompt (str): The prompt to use for the chain
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANALYSIS.
+            **kwargs (Any): The kwargs to pass to the chain
+
+        Returns:
+            AsyncGenerator[Tuple[Tuple[Union[str, int], ...], Any], Any]: The path and value of each completed value,
+                ending with the whole JSON object at path ()
+        """
+        chain = await self._build_chain(prompt)
+
+        async def stream() -> AsyncGenerator[Tuple[Tuple[Union[str, int], ...], Any], Any]:
+            parser = JSONStreamParser()
+            async with self._slot(prompt, priority, **kwargs):
+                async for chunk in chain.astream(kwargs):
+                    for event in parser.feed(chunk.content):
+                        yield event
+
+            if not parser.done:
+                json_data = parser.result()
+                if not isinstance(json_data, dict):
+                    raise ValueError("Failed to parse result to json")
+                yield (), json_data
+
+        async for event in self.retry_policy.stream(stream):
+            yield event
+
+    async def generate_response(self, prompt: str, priority: Priority = Priority.ANALYSIS, **kwargs: Any) -> str:
         """
         Generate a response
 
         Args:
             prompt (str): The prompt to use for the chain
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANALYSIS.
             **kwargs (Any): The kwargs to pass to the chain
 
         Returns:
             str: The response
         """
         chain = await self._build_chain(prompt)
-        response = await chain.ainvoke(kwargs)
-        return response.content
 
-    async def generate_stream_response(self, prompt: str, **kwargs: Any) -> AsyncGenerator[str, Any]:
+        async def attempt() -> str:
+            async with self._slot(prompt, priority, **kwargs):
+                response = await chain.ainvoke(kwargs)
+            return response.content
+
+        return await self.retry_policy.run(attempt)
+
+    async def _stream_chunks(
+        self, chain: RunnableSequence, prompt: str, priority: Priority, **kwargs: Any
+    ) -> AsyncGenerator[str, Any]:
+        """
+        Stream the answer of one attempt, wrapping the reasoning of reasoning models in [THINK] markers.
+
+        Args:
+            chain (RunnableSequence): The chain to stream
+            prompt (str): The prompt the chain was built from
+            priority (Priority): The priority class of the call
+            **kwargs (Any): The kwargs to pass to the chain
+
+        Returns:
+            AsyncGenerator[str, Any]: The response
+        """
+        async with self._slot(prompt, priority, **kwargs):
+            if not self.is_reasoning:
+                async for chunk in chain.astream(kwargs):
+                    yield chunk.content
+            else:
+                is_thinking = False
+                is_answering = False
+                async for chunk in chain.astream(kwargs):
+                    if not is_thinking:
+                        is_thinking = True
+                        yield "[THINK]"
+                    if (
+                        hasattr(chunk, "additional_kwargs")
+                        and "reasoning_content" in chunk.additional_kwargs
+                        and chunk.additional_kwargs["reasoning_content"]
+                    ):
+                        yield chunk.additional_kwargs["reasoning_content"]
+                    else:
+                        if chunk.content != "" and not is_answering:
+                            is_answering = True
+                            yield "[/THINK]"
+                        if is_answering:
+                            yield chunk.content
+
+    async def generate_stream_response(
+        self, prompt: str, priority: Priority = Priority.ANSWER, **kwargs: Any
+    ) -> AsyncGenerator[str, Any]:
         """
         Generate a stream response
 
         Args:
             prompt (str): The prompt to use for the chain
+            priority (Priority, optional): The priority class of the call. Defaults to Priority.ANSWER.
             **kwargs (Any): The kwargs to pass to the chain
 
         Returns:
             AsyncGenerator[str, Any]: The response
         """
         chain = await self._build_chain(prompt)
-        if not self.is_reasoning:
-            async for chunk in chain.astream(kwargs):
-                yield chunk.content
-        else:
-            is_answering = False
-            yield "[THINK]"
-            async for chunk in chain.astream(kwargs):
-                if (
-                    hasattr(chunk, "additional_kwargs")
-                    and "reasoning_content" in chunk.additional_kwargs
-                    and chunk.additional_kwargs["reasoning_content"]
-                ):
-                    yield chunk.additional_kwargs["reasoning_content"]
-                else:
-                    if chunk.content != "" and not is_answering:
-                        is_answering = True
-                        yield "[/THINK]"
-                    if is_answering:
-                        yield chunk.content
+        async for chunk in self.retry_policy.stream(lambda: self._stream_chunks(chain, prompt, priority, **kwargs)):
+            yield chunk
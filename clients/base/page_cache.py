@@ -0,0 +1,140 @@
+import hashlib
+import re
+import time
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from utils.cache import Cache
+
+
+class CachedPage(BaseModel):
+    url: str
+    title: str = ""
+    content_hash: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float
+    expires_at: float
+    text: str = ""
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Get the conditional request headers for revalidating this page.
+
+        Returns:
+            Dict[str, str]: The If-None-Match and If-Modified-Since headers that can be sent.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    def __init__(self, cache: Cache, ttl: float = 3600, max_age: float = 7 * 24 * 3600):
+        """
+        Content-addressed cache of cleaned page text.
+
+        Args:
+            cache (Cache): The backend storing page metadata and contents.
+            ttl (float, optional): Seconds a page is served without revalidation, unless the server asks for less.
+                Defaults to 3600.
+            max_age (float, optional): Seconds a stale page is kept for conditional revalidation. Defaults to 7 days.
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.max_age = max_age
+
+    def _freshness(self, cache_control: Optional[str]) -> Optional[float]:
+        """
+        Get the freshness lifetime allowed by the Cache-Control header.
+
+        Args:
+            cache_control (Optional[str]): The Cache-Control header value.
+
+        Returns:
+            Optional[float]: The lifetime in seconds, or None if the page must not be stored.
+        """
+        if not cache_control:
+            return self.ttl
+        cache_control = cache_control.lower()
+        if "no-store" in cache_control:
+            return None
+        if "no-cache" in cache_control:
+            return 0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match:
+            return min(float(match.group(1)), self.ttl)
+        return self.ttl
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Get a cached page, fresh or stale.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            Optional[CachedPage]: The cached page with its text, or None if it is not cached.
+        """
+        meta = await self.cache.get(f"page:{url}")
+        if meta is None:
+            return None
+        text = await self.cache.get(f"content:{meta['content_hash']}")
+        if text is None:
+            return None
+        return CachedPage(**meta, text=text)
+
+    async def put(
+        self,
+        url: str,
+        text: str,
+        title: str = "",
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ):
+        """
+        Store the cleaned text of a page along with its validators.
+
+        Args:
+            url (str): The page URL.
+            text (str): The cleaned page text.
+            title (str, optional): The page title. Defaults to "".
+            etag (Optional[str], optional): The ETag response header. Defaults to None.
+            last_modified (Optional[str], optional): The Last-Modified response header. Defaults to None.
+            cache_control (Optional[str], optional): The Cache-Control response header. Defaults to None.
+        """
+        freshness = self._freshness(cache_control)
+        if freshness is None or not text:
+            return
+
+        now = time.time()
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        page = CachedPage(
+            url=url,
+            title=title,
+            content_hash=content_hash,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=now,
+            expires_at=now + freshness,
+        )
+        await self.cache.set(f"content:{content_hash}", text, ttl=self.max_age)
+        await self.cache.set(f"page:{url}", page.model_dump(exclude={"text"}), ttl=self.max_age)
+
+    async def refresh(self, page: CachedPage, cache_control: Optional[str] = None):
+        """
+        Mark a cached page as fresh again after the server confirmed it is unchanged.
+
+        Args:
+            page (CachedPage): The revalidated page.
+            cache_control (Optional[str], optional): The Cache-Control header of the 304 response. Defaults to None.
+        """
+        await self.put(page.url, page.text, page.title, page.etag, page.last_modified, cache_control)
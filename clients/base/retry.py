@@ -0,0 +1,223 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+)
+
+import httpx
+import openai
+
+from utils.logger import logger
+
+RATE_LIMIT = "rate_limit"
+TRANSPORT = "transport"
+PARSE = "parse"
+FATAL = "fatal"
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify an LLM call error to decide whether and how to retry it.
+
+    Args:
+        error (BaseException): The error raised by the call.
+
+    Returns:
+        str: One of rate_limit, transport, parse or fatal.
+    """
+    if isinstance(error, openai.RateLimitError):
+        return RATE_LIMIT
+    if isinstance(error, openai.APIStatusError):
+        return TRANSPORT if error.status_code >= 500 or error.status_code == 408 else FATAL
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError, asyncio.TimeoutError, ConnectionError)):
+        return TRANSPORT
+    if isinstance(error, ValueError):
+        return PARSE
+    return FATAL
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Read the delay requested by the provider from the Retry-After headers of an error response.
+
+    Args:
+        error (BaseException): The error raised by the call.
+
+    Returns:
+        Optional[float]: The delay in seconds, or None if the provider did not ask for one.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20,
+        deadline: Optional[float] = 120,
+    ):
+        """
+        Retry with exponential backoff and full jitter, honoring Retry-After and a per-call deadline.
+
+        Args:
+            max_attempts (int, optional): The maximum number of attempts per call. Defaults to 3.
+            base_delay (float, optional): The backoff delay before the first retry in seconds. Defaults to 0.5.
+            max_delay (float, optional): The cap of a single backoff delay in seconds. Defaults to 20.
+            deadline (Optional[float], optional): The time budget of a call across all attempts in seconds.
+                Defaults to 120.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.metrics: Dict[str, Dict[str, int]] = {"attempts": {}, "retries": {}, "failures": {}}
+
+    def _count(self, metric: str, kind: str):
+        self.metrics[metric][kind] = self.metrics[metric].get(kind, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {metric: dict(counts) for metric, counts in self.metrics.items()}
+
+    def _delay(self, attempt: int, error: BaseException, kind: str) -> float:
+        """
+        Compute the delay before the next attempt.
+
+        Args:
+            attempt (int): The number of the attempt that failed, starting at 1.
+            error (BaseException): The error of that attempt.
+            kind (str): The error classification.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        if kind == PARSE:
+            return 0.0
+        requested = retry_after(error)
+        if requested is not None:
+            return min(requested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _on_failure(
+        self, attempt: int, max_attempts: int, error: Exception, deadline: Optional[float], can_retry: bool = True
+    ) -> Optional[float]:
+        """
+        Record a failed attempt and decide whether to retry it.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 1.
+            max_attempts (int): The maximum number of attempts.
+            error (Exception): The error of the attempt.
+            deadline (Optional[float]): The monotonic time by which the call must finish.
+            can_retry (bool, optional): False if the call cannot be repeated, e.g. a stream that produced output.
+                Defaults to True.
+
+        Returns:
+            Optional[float]: The delay before the next attempt, or None to give up.
+        """
+        kind = classify_error(error)
+        delay = self._delay(attempt, error, kind)
+        out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+        if kind == FATAL or attempt >= max_attempts or out_of_time or not can_retry:
+            self._count("failures", kind)
+            logger.error(f"LLM 调用失败 ({kind}), 第 {attempt} 次尝试, 不再重试: {type(error).__name__}: {error}")
+            return None
+
+        self._count("retries", kind)
+        logger.warning(
+            f"LLM 调用失败 ({kind}), 第 {attempt} 次尝试, {delay:.2f}s 后重试: {type(error).__name__}: {error}"
+        )
+        return delay
+
+    async def run(self, func: Callable[[], Awaitable[Any]], max_attempts: Optional[int] = None) -> Any:
+        """
+        Call func until it succeeds, the error is not retryable, the attempts run out or the deadline passes.
+
+        Args:
+            func (Callable[[], Awaitable[Any]]): The call to make.
+            max_attempts (Optional[int], optional): Overrides the maximum number of attempts. Defaults to None.
+
+        Returns:
+            Any: The result of func.
+        """
+        max_attempts = max_attempts or self.max_attempts
+        deadline = time.monotonic() + self.deadline if self.deadline else None
+
+        for attempt in range(1, max_attempts + 1):
+            self._count("attempts", "total")
+            try:
+                if deadline is None:
+                    return await func()
+                return await asyncio.wait_for(func(), timeout=max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                delay = self._on_failure(attempt, max_attempts, e, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def stream(self, func: Callable[[], AsyncIterator[Any]]) -> AsyncGenerator[Any, None]:
+        """
+        Stream from func, retrying only failures that happen before the first chunk has been yielded. The wait for
+        the first chunk is bounded by the deadline; once the stream has started it runs to its end.
+
+        Args:
+            func (Callable[[], AsyncIterator[Any]]): Creates the stream to consume.
+
+        Returns:
+            AsyncGenerator[Any, None]: The chunks of the first stream that gets going.
+        """
+        deadline = time.monotonic() + self.deadline if self.deadline else None
+
+        for attempt in range(1, self.max_attempts + 1):
+            self._count("attempts", "total")
+            iterator = func().__aiter__()
+            started = False
+            try:
+                while True:
+                    try:
+                        if started or deadline is None:
+                            chunk = await iterator.__anext__()
+                        else:
+                            chunk = await asyncio.wait_for(
+                                iterator.__anext__(), timeout=max(0.0, deadline - time.monotonic())
+                            )
+                    except StopAsyncIteration:
+                        return
+                    started = True
+                    yield chunk
+            except Exception as e:
+                delay = self._on_failure(attempt, self.max_attempts, e, deadline, can_retry=not started)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            finally:
+                if hasattr(iterator, "aclose"):
+                    await iterator.aclose()
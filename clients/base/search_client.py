@@ -1,23 +1,111 @@
-import re
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import AsyncGenerator, List, Optional, Tuple
 
-from langchain_community.document_loaders import AsyncHtmlLoader
-from langchain_community.document_transformers import Html2TextTransformer
+import aiohttp
 
+from schemas.search_options import SearchOptions
 from schemas.search_result import SearchResult
+from utils.documents import document_type, extract_document
+from utils.html import clean_html
+from utils.logger import logger
+from utils.workers import cpu_pool
+
+from .page_cache import CachedPage, PageCache
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
 
 
 class SearchClient(ABC):
 
-    def __init__(self, max_concurrent: int, needs_crawler: bool = False, needs_filter: bool = False):
+    def __init__(
+        self,
+        max_concurrent: int,
+        needs_crawler: bool = False,
+        needs_filter: bool = False,
+        timeout: float = 30,
+        pool_size: int = 100,
+        pool_size_per_host: int = 20,
+        keepalive_timeout: float = 30,
+        page_cache: Optional[PageCache] = None,
+        filter_mode: str = "single",
+        max_document_bytes: int = 10 * 1024 * 1024,
+        pdf_max_pages: int = 30,
+    ):
         self.max_concurrent = max_concurrent
         self.needs_crawler = needs_crawler
         self.needs_filter = needs_filter
+        self.filter_mode = filter_mode
+
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.page_cache = page_cache
+        self.max_document_bytes = max_document_bytes
+        self.pdf_max_pages = pdf_max_pages
+
+    def resolve_options(self, options: Optional[SearchOptions] = None) -> SearchOptions:
+        """
+        Fill the options a request left unset with the defaults of this client.
+
+        Args:
+            options (Optional[SearchOptions], optional): The options of the request. Defaults to None.
+
+        Returns:
+            SearchOptions: The complete options, leaving the client itself untouched.
+        """
+        options = options or SearchOptions()
+        defaults = {
+            "needs_crawler": self.needs_crawler,
+            "needs_filter": self.needs_filter,
+            "filter_mode": self.filter_mode,
+        }
+        return options.model_copy(
+            update={key: value for key, value in defaults.items() if getattr(options, key) is None}
+        )
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared HTTP session, creating it with a bounded keep-alive connection pool on first use.
+
+        Returns:
+            aiohttp.ClientSession: The shared HTTP session.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout), headers=DEFAULT_HEADERS
+            )
+        return self._session
+
+    async def start(self):
+        """
+        Prepare the client before the first search, so that the first request does not pay for the warm-up.
+        """
+        await self._get_session()
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     def _clean_web_content(self, content: str) -> str:
         """
-        Clean web content from HTML tags, scripts, styles, comments, non-breaking spaces, and other elements.
+        Clean web content from HTML tags, scripts, styles, comments, character references and extra whitespace.
 
         Args:
             content (str): The web content to be cleaned.
@@ -25,44 +113,169 @@ class SearchClient(ABC):
         Returns:
             str: The cleaned web content.
         """
-        content = content.replace("\n", " ")
-        content = re.sub(r"<[^>]+>", "", content)
-        content = re.sub(r"<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>", "", content, flags=re.IGNORECASE)
-        content = re.sub(r"<style\b[^<]*(?:(?!<\/style>)<[^<]*)*<\/style>", "", content, flags=re.IGNORECASE)
-        content = re.sub(r"<!--.*?-->", "", content, flags=re.DOTALL)
-        content = re.sub(r"&nbsp;", " ", content)
-        content = re.sub(r"&lt;", "<", content)
-        content = re.sub(r"&gt;", ">", content)
-        content = re.sub(r"&amp;", "&", content)
-        content = re.sub(r"&quot;", '"', content)
-        content = re.sub(r"&apos;", "'", content)
-        content = re.sub(r"\s+", " ", content)
-        content = re.sub(r"<[^>]*>\s*<\/[^>]*>", "", content)
-        content = content.strip()
-        return content
-
-    async def _crawler_by_requests(self, search_results: List[SearchResult]) -> List[SearchResult]:
-        """
-        Crawl web content by requests
+        return clean_html(content)
+
+    async def _get_cached_page(self, url: str) -> Optional[CachedPage]:
+        """
+        Get a page from the page cache if it is fresh or the server confirms it is unchanged.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            Optional[CachedPage]: The usable cached page, or None if the page has to be fetched again.
+        """
+        if self.page_cache is None:
+            return None
+
+        cached = await self.page_cache.get(url)
+        if cached is None or cached.is_fresh():
+            return cached
+        if not cached.validators():
+            return None
+
+        try:
+            session = await self._get_session()
+            async with session.get(url, headers=cached.validators()) as response:
+                if response.status != 304:
+                    return None
+                await self.page_cache.refresh(cached, response.headers.get("Cache-Control"))
+                return cached
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"页面缓存验证失败: {url}, {str(e) or type(e).__name__}")
+            return None
+
+    async def _read_document(
+        self, response: aiohttp.ClientResponse, url: str
+    ) -> Optional[Tuple[str, bytes, Optional[str]]]:
+        """
+        Stream a response body into memory up to max_document_bytes. Text documents over the cap are truncated,
+        PDFs over the cap are skipped since they cannot be parsed without their trailer.
+
+        Args:
+            response (aiohttp.ClientResponse): The response.
+            url (str): The document URL.
+
+        Returns:
+            Optional[Tuple[str, bytes, Optional[str]]]: The document type, the body and the charset, or None if the
+                document type is not supported or the PDF is too large.
+        """
+        kind = document_type(response.headers.get("Content-Type", ""), url)
+        if kind is None:
+            logger.info(f"跳过不支持的文档类型: {url}, {response.headers.get('Content-Type')}")
+            return None
+        if kind == "pdf" and (response.content_length or 0) > self.max_document_bytes:
+            logger.info(f"跳过过大的文档: {url}, {response.content_length} 字节")
+            return None
+
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_document_bytes:
+                if kind == "pdf":
+                    logger.info(f"跳过过大的文档: {url}, 超过 {self.max_document_bytes} 字节")
+                    return None
+                break
+        return kind, b"".join(chunks)[: self.max_document_bytes], response.charset
+
+    async def _fetch_page_text(self, url: str) -> Optional[str]:
+        """
+        Fetch the cleaned text of a page through the page cache, revalidating stale entries with a conditional GET.
+        HTML, PDF, plain text and JSON documents are extracted according to their content type, off the event loop.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            Optional[str]: The cleaned text, or None if the page could not be fetched.
+        """
+        cached = await self.page_cache.get(url) if self.page_cache else None
+        if cached is not None and cached.is_fresh():
+            return cached.text
+
+        headers = cached.validators() if cached else {}
+        try:
+            session = await self._get_session()
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    await self.page_cache.refresh(cached, response.headers.get("Cache-Control"))
+                    return cached.text
+                if response.status != 200:
+                    logger.warning(f"爬取页面失败: {url}, 状态码: {response.status}")
+                    return None
+                document = await self._read_document(response, url)
+                if document is None:
+                    return None
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "cache_control": response.headers.get("Cache-Control"),
+                }
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"爬取页面失败: {url}, {str(e) or type(e).__name__}")
+            return cached.text if cached is not None else None
+
+        try:
+            text = await cpu_pool.run(extract_document, *document, self.pdf_max_pages)
+        except Exception as e:
+            logger.warning(f"提取文档内容失败: {url}, {str(e) or type(e).__name__}")
+            return None
+        if self.page_cache is not None:
+            await self.page_cache.put(url, text, **validators)
+        return text
+
+    async def _crawler_by_requests(self, search_results: List[SearchResult]) -> AsyncGenerator[SearchResult, None]:
+        """
+        Crawl web content by requests, yielding each search result as soon as its page is fetched and converted.
 
         Args:
             search_results (List[SearchResult]): The search results to be crawled.
 
         Returns:
-            List[SearchResult]: The crawled search results.
+            AsyncGenerator[SearchResult, None]: The crawled search results, in completion order.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def crawl_result(search_result: SearchResult) -> SearchResult:
+            try:
+                async with semaphore:
+                    text = await self._fetch_page_text(search_result.source)
+                if text:
+                    search_result.content += "\n" + text
+            except Exception as e:
+                logger.error(f"爬取页面失败: {search_result.source}, {str(e)}")
+            return search_result
+
+        tasks = [asyncio.create_task(crawl_result(search_result)) for search_result in search_results]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def crawl_stream(
+        self, search_results: List[SearchResult], options: Optional[SearchOptions] = None
+    ) -> AsyncGenerator[SearchResult, None]:
         """
-        urls = [result.source for result in search_results]
-        loader = AsyncHtmlLoader(urls, requests_per_second=self.max_concurrent)
-        docs = await loader.aload()
+        Crawl the full web content of the search results if crawling is enabled, streaming them as they complete.
 
-        html2text = Html2TextTransformer()
-        docs_transformed = html2text.transform_documents(docs)
+        Args:
+            search_results (List[SearchResult]): The search results to be crawled.
+            options (Optional[SearchOptions], optional): The options of the request. Defaults to None.
 
-        for doc, search_result in zip(docs_transformed, search_results):
-            search_result.content += "\n" + self._clean_web_content(doc.page_content)
+        Returns:
+            AsyncGenerator[SearchResult, None]: The search results, in completion order.
+        """
+        if not self.resolve_options(options).needs_crawler:
+            for search_result in search_results:
+                yield search_result
+            return
 
-        return search_results
+        async for search_result in self._crawler_by_requests(search_results):
+            yield search_result
 
     @abstractmethod
-    async def search(self, query: str, count: int = 10) -> List[SearchResult]:
+    async def search(self, query: str, options: Optional[SearchOptions] = None) -> List[SearchResult]:
         pass
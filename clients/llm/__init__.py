@@ -1,4 +1,5 @@
 from .deepseek_client import DeepseekLLMClient
+from .failover_client import FailoverLLMClient
 from .openai_client import OpenAILLMClient
 
-__all__ = ["OpenAILLMClient", "DeepseekLLMClient"]
+__all__ = ["OpenAILLMClient", "DeepseekLLMClient", "FailoverLLMClient"]
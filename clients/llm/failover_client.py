@@ -0,0 +1,272 @@
+import asyncio
+import bisect
+import time
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel
+
+from clients.base import LLMClient
+from clients.base.governor import Priority
+from utils.logger import logger
+
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 8, 13, 21, 34, 60]
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS, decay: float = 0.98):
+        """
+        Exponentially decayed latency histogram, so that quantiles follow the recent behavior of a backend.
+
+        Args:
+            buckets (List[float], optional): The upper bounds of the buckets in seconds. Defaults to LATENCY_BUCKETS.
+            decay (float, optional): The weight kept by older samples on each new sample. Defaults to 0.98.
+        """
+        self.buckets = buckets
+        self.decay = decay
+        self.counts = [0.0] * (len(buckets) + 1)
+        self.samples = 0
+
+    def record(self, seconds: float):
+        self.counts = [count * self.decay for count in self.counts]
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.samples += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a latency quantile as the upper bound of the bucket that holds it.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            Optional[float]: The latency in seconds, or None without samples.
+        """
+        total = sum(self.counts)
+        if not total:
+            return None
+        running = 0.0
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            running += count
+            if running >= q * total:
+                return bound if bound != float("inf") else self.buckets[-1] * 2
+        return self.buckets[-1] * 2
+
+
+class FailoverLLMClient(LLMClient):
+    def __init__(
+        self,
+        clients: List[LLMClient],
+        hedge_delay: Optional[float] = 3.0,
+        min_samples: int = 20,
+        quantile: float = 0.9,
+    ):
+        """
+        Spread calls over several interchangeable backends.
+
+        Streams are hedged: if the primary has not produced its first chunk within hedge_delay, the next backend is
+        started as well, the first to stream wins and the others are cancelled. Any call fails over to the next
+        backend on errors. The primary is the backend with the lowest recent first-chunk latency quantile. Methods
+        not overridden here run on the first configured backend.
+
+        Args:
+            clients (List[LLMClient]): The backends, in preference order until enough latencies are recorded.
+            hedge_delay (Optional[float], optional): The seconds to wait for a first chunk before hedging, or None
+                to only fail over. Defaults to 3.0.
+            min_samples (int, optional): The samples a backend needs before its latency is used to rank it.
+                Defaults to 20.
+            quantile (float, optional): The latency quantile backends are ranked by. Defaults to 0.9.
+        """
+        if not clients:
+            raise ValueError("At least one LLM client is required")
+        primary = clients[0]
+        super().__init__(
+            primary.llm,
+            is_reasoning=primary.is_reasoning,
+            governor=primary.governor,
+            retry_policy=primary.retry_policy,
+            chain_cache_size=primary.chain_cache_size,
+        )
+        self.clients = clients
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.quantile = quantile
+
+        self.latencies = [LatencyHistogram() for _ in clients]
+        self.metrics = [{"calls": 0, "wins": 0, "hedges": 0, "failures": 0} for _ in clients]
+
+    def _ranked(self) -> List[int]:
+        """
+        Order the backends by their recent first-chunk latency, keeping the configured order for the others.
+
+        Returns:
+            List[int]: The backend indexes, primary first.
+        """
+
+        def key(index: int):
+            histogram = self.latencies[index]
+            if histogram.samples < self.min_samples:
+                return (float("inf"), index)
+            return (histogram.quantile(self.quantile), index)
+
+        return sorted(range(len(self.clients)), key=key)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get the call counters and first-chunk latency quantiles of each backend.
+
+        Returns:
+            List[Dict[str, Any]]: The metrics, in configured backend order.
+        """
+        return [
+            {
+                "model": getattr(client.llm, "model_name", None),
+                **metrics,
+                "samples": histogram.samples,
+                "p50": histogram.quantile(0.5),
+                "p90": histogram.quantile(0.9),
+                "p99": histogram.quantile(0.99),
+            }
+            for client, metrics, histogram in zip(self.clients, self.metrics, self.latencies)
+        ]
+
+    async def _race(
+        self, start: Callable[[LLMClient], AsyncIterator[Any]], hedge: bool = True
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Stream from the first backend to produce a chunk, hedging slow backends and failing over on errors.
+
+        A failed backend is replaced by the next one right away, even while a hedged stream is still pending. The
+        cancelled losers of a race are recorded with the time they had been waiting, at least hedge_delay, so a
+        slow primary is ranked down even though it never finishes.
+
+        Args:
+            start (Callable[[LLMClient], AsyncIterator[Any]]): Starts the stream of a backend.
+            hedge (bool, optional): Whether to start the next backend when the first chunk is late. Defaults to True.
+
+        Returns:
+            AsyncGenerator[Any, None]: The chunks of the winning backend.
+        """
+        queue = self._ranked()
+        streams: Dict[asyncio.Task, tuple] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            index = queue.pop(0)
+            stream = start(self.clients[index]).__aiter__()
+            self.metrics[index]["calls"] += 1
+            task = asyncio.ensure_future(stream.__anext__())
+            streams[task] = (index, stream, time.monotonic())
+
+        async def cancel(tasks):
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for task in tasks:
+                await streams.pop(task)[1].aclose()
+
+        launch()
+        try:
+            while streams:
+                timeout = self.hedge_delay if hedge and queue and self.hedge_delay is not None else None
+                done, _ = await asyncio.wait(streams, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.warning(f"LLM 首个响应超过 {self.hedge_delay}s, 发送对冲请求")
+                    self.metrics[queue[0]]["hedges"] += 1
+                    launch()
+                    continue
+
+                winner, failed = None, 0
+                for task in done:
+                    index, stream, started = streams[task]
+                    error = task.exception()
+                    if error is None or isinstance(error, StopAsyncIteration):
+                        winner = winner or task
+                        continue
+                    streams.pop(task)
+                    last_error = error
+                    failed += 1
+                    self.metrics[index]["failures"] += 1
+                    self.latencies[index].record(self.latencies[index].buckets[-1] * 2)
+                    logger.error(f"LLM 后端 {index} 调用失败, 切换后端: {type(error).__name__}: {error}")
+
+                if winner is None:
+                    for _ in range(min(failed, len(queue))):
+                        launch()
+                    continue
+
+                index, stream, started = streams.pop(winner)
+                now = time.monotonic()
+                for loser, _, loser_started in streams.values():
+                    self.latencies[loser].record(max(now - loser_started, self.hedge_delay or 0.0))
+                await cancel(list(streams))
+                self.metrics[index]["wins"] += 1
+                self.latencies[index].record(time.monotonic() - started)
+                if isinstance(winner.exception(), StopAsyncIteration):
+                    return
+
+                yield winner.result()
+                async for chunk in stream:
+                    yield chunk
+                return
+        finally:
+            await cancel(list(streams))
+
+        raise last_error
+
+    async def _first(self, start: Callable[[LLMClient], AsyncIterator[Any]]) -> Any:
+        race = self._race(start, hedge=False)
+        try:
+            return await race.__anext__()
+        finally:
+            await race.aclose()
+
+    async def generate_dict_response(
+        self, prompt: str, retries: Optional[int] = None, priority: Priority = Priority.ANALYSIS, **kwargs: Any
+    ) -> Dict[str, Any]:
+        async def start(client: LLMClient) -> AsyncGenerator[Dict[str, Any], None]:
+            response = await client.generate_dict_response(prompt, retries, priority, **kwargs)
+            if not response:
+                raise ValueError("Response is not a JSON object")
+            yield response
+
+        try:
+            return await self._first(start)
+        except ValueError:
+            return {}
+
+    async def generate_dict_stream_response(
+        self, prompt: str, pydantic_object: Type[BaseModel], priority: Priority = Priority.ANALYSIS, **kwargs: Any
+    ) -> AsyncGenerator[Dict[str, Any], Any]:
+        async for chunk in self._race(
+            lambda client: client.generate_dict_stream_response(prompt, pydantic_object, priority, **kwargs)
+        ):
+            yield chunk
+
+    async def generate_json_events(
+        self, prompt: str, priority: Priority = Priority.ANALYSIS, **kwargs: Any
+    ) -> AsyncGenerator[Tuple[Tuple[Union[str, int], ...], Any], Any]:
+        async for event in self._race(lambda client: client.generate_json_events(prompt, priority, **kwargs)):
+            yield event
+
+    async def generate_response(self, prompt: str, priority: Priority = Priority.ANALYSIS, **kwargs: Any) -> str:
+        async def start(client: LLMClient) -> AsyncGenerator[str, None]:
+            yield await client.generate_response(prompt, priority, **kwargs)
+
+        return await self._first(start)
+
+    async def generate_stream_response(
+        self, prompt: str, priority: Priority = Priority.ANSWER, **kwargs: Any
+    ) -> AsyncGenerator[str, Any]:
+        async for chunk in self._race(lambda client: client.generate_stream_response(prompt, priority, **kwargs)):
+            yield chunk
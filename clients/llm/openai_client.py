@@ -1,9 +1,10 @@
 from langchain_openai import ChatOpenAI
 
 from clients.base import LLMClient
+from clients.base.governor import get_governor
 
 
 class OpenAILLMClient(LLMClient):
     def __init__(self, api_key: str, base_url: str, model: str, temperature: float = 0.7, is_reasoning: bool = False):
-        llm = ChatOpenAI(api_key=api_key, base_url=base_url, temperature=temperature, model=model)
-        super().__init__(llm, is_reasoning)
+        llm = ChatOpenAI(api_key=api_key, base_url=base_url, temperature=temperature, model=model, max_retries=0)
+        super().__init__(llm, is_reasoning, governor=get_governor(f"{base_url}|{model}"))
@@ -60,6 +60,44 @@ FILTER_RESULTS_PROMPT = """请分析以下搜索结果，提取与查询"{query}
 
 请直接返回提取后的内容，无需其他解释。"""
 
+FILTER_RESULTS_BATCH_PROMPT = """请分析以下多条搜索结果，分别提取每条结果中与查询"{query}"最相关的核心内容。
+
+要求：
+1. 保留与查询词"{query}"直接相关的信息。
+2. 删除无关内容（如广告、推广信息等）。
+3. 每条结果的字数尽量控制在200字以内；如果内容复杂，可扩展至300字，但需保持语言简洁清晰。
+4. 提取的核心内容应以自然段落形式呈现；如果有多个相关信息点，可以用分号或编号分隔。
+5. 每条结果单独提取，不要合并或混用不同结果的内容。
+
+相关性判断标准：
+1. 内容必须直接提及查询词中的核心关键词。
+2. 如果内容涉及查询词的背景、发展趋势或具体案例，则视为相关。
+3. 广告、推广信息或与查询词无直接关联的内容视为无关。
+
+异常处理规则：
+1. 如果某条搜索结果完全无关，该条返回"未找到与查询相关的内容"。
+2. 如果某条搜索结果过短（少于50字），该条直接返回原文。
+3. 如果某条搜索结果过长，优先提取最相关的核心部分。
+
+请以JSON格式返回，包含 results 字段，为列表，每项包含以下字段：
+1. id: 整数，对应搜索结果的编号。
+2. content: 字符串，提取后的内容。
+
+输出字段示例：
+```json
+{{
+    "results": [
+        {{"id": 1, "content": "提取后的内容"}},
+        {{"id": 2, "content": "未找到与查询相关的内容"}}
+    ]
+}}
+```
+
+搜索结果：
+{content}
+
+请仅返回JSON格式数据，且每条搜索结果都必须返回。"""
+
 GENERATE_ANSWER_WITH_SEARCH_PROMPT = """# 以下内容是基于用户发送的消息的搜索结果:
 {search_results}
 在我给你的搜索结果中，每个结果都是[webpage X begin]{{"title":"...", "content": "...", "source": ""https://XXX""}}[webpage X end]格式的，X代表每篇文章的数字索引。请在适当的情况下在句子末尾引用上下文。请按照引用编号<sup><a href=source target="_blank">X</a></sup>的格式在答案中对应部分引用上下文。如果一句话源自多个上下文，请列出所有相关的引用编号，例如<sup><a href=source target="_blank">3</a></sup> <sup><a href=source target="_blank">5</a></sup>，多个引用编号之间用空格分隔，切记不要将引用集中在最后返回引用编号，而是在答案对应部分列出。
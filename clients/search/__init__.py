@@ -1,4 +1,5 @@
 from .bing_client import BingSearchClient
 from .bocha_client import BochaSearchClient
+from .cached_client import CachedSearchClient
 
-__all__ = ["BingSearchClient", "BochaSearchClient"]
+__all__ = ["BingSearchClient", "BochaSearchClient", "CachedSearchClient"]
@@ -1,85 +1,209 @@
 import asyncio
-from typing import List
+import posixpath
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, unquote, urlsplit
 
-from fake_useragent import UserAgent
-from playwright.async_api import async_playwright
+import aiohttp
 
-from clients.base import SearchClient
+from clients.base import PageCache, SearchClient
+from schemas.search_options import SearchOptions
 from schemas.search_result import SearchResult
+from utils.cache import Cache, MemoryCache
+from utils.documents import decode_text, document_type, extract_document
+from utils.html import extract_title, needs_javascript
 from utils.logger import logger
+from utils.workers import cpu_pool, html_to_text
+
+from .browser_pool import BrowserPool
 
 
 class BingSearchClient(SearchClient):
-    def __init__(self, max_concurrent: int = 5, needs_crawler: bool = True, needs_filter: bool = True):
-        self.results = []
-        self.semaphore = None
+    def __init__(
+        self,
+        max_concurrent: int = 5,
+        needs_crawler: bool = True,
+        needs_filter: bool = True,
+        page_cache: Optional[PageCache] = None,
+        block_resources: bool = True,
+        max_page_uses: int = 50,
+        navigation_timeout: float = 15,
+        settle_timeout: float = 2,
+        http_fast_path: bool = True,
+        http_timeout: float = 10,
+        domain_policy_cache: Optional[Cache] = None,
+        max_document_bytes: int = 10 * 1024 * 1024,
+        pdf_max_pages: int = 30,
+    ):
+        """
+        Bing search client scraping the result pages, with plain HTTP first and the browser only for pages that
+        need JavaScript.
+
+        Args:
+            max_concurrent (int, optional): The maximum number of open browser pages. Defaults to 5.
+            needs_crawler (bool, optional): Whether to crawl the results. Defaults to True.
+            needs_filter (bool, optional): Whether to filter the results. Defaults to True.
+            page_cache (Optional[PageCache], optional): The page cache. Defaults to None.
+            block_resources (bool, optional): Whether the browser blocks images, fonts, media and ad hosts.
+                Defaults to True.
+            max_page_uses (int, optional): The navigations after which a browser page is replaced. Defaults to 50.
+            navigation_timeout (float, optional): The browser navigation timeout in seconds. Defaults to 15.
+            settle_timeout (float, optional): How long the browser waits for the network to go idle, in seconds.
+                Defaults to 2.
+            http_fast_path (bool, optional): Whether to try a plain HTTP GET before the browser. Defaults to True.
+            http_timeout (float, optional): The plain HTTP timeout in seconds. Defaults to 10.
+            domain_policy_cache (Optional[Cache], optional): Remembers per host whether plain HTTP is enough.
+                Defaults to an in-memory cache keeping each decision for a day.
+            max_document_bytes (int, optional): The download size cap of a page or document. Defaults to 10 MiB.
+            pdf_max_pages (int, optional): The maximum number of PDF pages to extract. Defaults to 30.
+        """
+        self.http_fast_path = http_fast_path
+        self.http_timeout = http_timeout
+        self.domain_policies = domain_policy_cache or MemoryCache(max_size=4096, ttl=86400)
+        self.metrics = {"http": 0, "browser": 0, "escalated": 0, "documents": 0}
+        self.pool = BrowserPool(
+            max_pages=max_concurrent,
+            max_page_uses=max_page_uses,
+            block_resources=block_resources,
+            navigation_timeout=navigation_timeout,
+            settle_timeout=settle_timeout,
+        )
 
-        self.playwright = None
-        self.browser = None
-        self.context = None
-        self._initialized = False
-        self._lock = asyncio.Lock()
+        super().__init__(
+            max_concurrent,
+            needs_crawler,
+            needs_filter,
+            page_cache=page_cache,
+            max_document_bytes=max_document_bytes,
+            pdf_max_pages=pdf_max_pages,
+        )
 
-        super().__init__(max_concurrent, needs_crawler, needs_filter)
+    async def start(self):
+        """
+        Launch the browser ahead of the first search.
+        """
+        await super().start()
+        await self.pool.start()
 
     async def init_browser(self):
-        if not self._initialized:
-            async with self._lock:
-                if not self._initialized:
-                    self.playwright = await async_playwright().start()
-                    self.browser = await self.playwright.chromium.launch(headless=True)
-                    self.context = await self.browser.new_context(
-                        viewport={"width": 1920, "height": 1080}, user_agent=UserAgent().random
-                    )
-                    self.semaphore = asyncio.Semaphore(self.max_concurrent)
-                    self._initialized = True
+        await self.start()
 
     async def close(self):
-        if self.browser:
-            async with self._lock:
-                if self.browser:
-                    await self.browser.close()
-                if self.playwright:
-                    await self.playwright.stop()
-                self._initialized = False
+        await self.pool.close()
+        await super().close()
+
+    async def scrape_single_page(self, link: str) -> Optional[dict]:
+        """
+        Scrape a single page from a link, over plain HTTP when possible and in the browser when the page needs
+        JavaScript. The choice is remembered per host, so hosts known to need the browser skip the HTTP attempt.
+        Links to documents such as PDFs are only downloaded over HTTP and never escalated to the browser.
+
+        Args:
+            link (str): The link to scrape.
+
+        Returns:
+            Optional[dict]: A dictionary containing the scraped data, or None if the page could not be scraped.
+        """
+        cached = await self._get_cached_page(link)
+        if cached is not None:
+            return {"title": cached.title, "url": link, "content": cached.text}
+
+        host = urlsplit(link).hostname or ""
+        is_document = document_type("", link) not in (None, "html")
+        if is_document or (self.http_fast_path and await self.domain_policies.get(host) != "browser"):
+            result, verdict = await self._scrape_with_http(link)
+            if verdict == "document":
+                return result
+            if verdict == "http":
+                await self.domain_policies.set(host, "http")
+                self.metrics["http"] += 1
+                return result
+            if is_document:
+                return None
+            if verdict == "browser":
+                await self.domain_policies.set(host, "browser")
+                self.metrics["escalated"] += 1
+
+        return await self._scrape_with_browser(link)
 
-    async def scrape_single_page(self, link: str) -> dict:
+    async def _scrape_with_http(self, link: str) -> Tuple[Optional[dict], Optional[str]]:
         """
-        Scrape a single page from a link.
+        Scrape a page with a plain HTTP GET, without running its JavaScript. PDF, plain text and JSON documents are
+        extracted directly, since the browser would not render them any better.
 
         Args:
             link (str): The link to scrape.
 
         Returns:
-            dict: A dictionary containing the scraped data.
+            Tuple[Optional[dict], Optional[str]]: The scraped data, and the verdict: http if the page was scraped,
+                browser if the host is likely to need the browser for its other pages too, document if the link
+                is a non-HTML document, or None if this page should be retried in the browser.
         """
         try:
-            async with self.semaphore:
-                new_page = await self.context.new_page()
-                response = await new_page.goto(link, wait_until="networkidle", timeout=30000)
+            session = await self._get_session()
+            async with session.get(link, timeout=aiohttp.ClientTimeout(total=self.http_timeout)) as response:
+                if response.status in (401, 403, 429):
+                    return None, "browser"
+                if response.status != 200:
+                    return None, None
+                document = await self._read_document(response, link)
+                headers = response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"HTTP 爬取页面失败: {link}, {str(e) or type(e).__name__}")
+            return None, None
 
-                content_type = response.headers.get("content-type", "").lower()
-                is_pdf = "pdf" in content_type or link.lower().endswith(".pdf")
+        if document is None:
+            return None, "document"
+        kind, data, charset = document
+        if kind == "html":
+            html = decode_text(data, charset)
+            text = await cpu_pool.run(html_to_text, html)
+            if needs_javascript(html, text, self.pool.min_text_length):
+                return None, "browser"
+            title, verdict = extract_title(html), "http"
+        else:
+            self.metrics["documents"] += 1
+            try:
+                text = await cpu_pool.run(extract_document, kind, data, charset, self.pdf_max_pages)
+            except Exception as e:
+                logger.warning(f"提取文档内容失败: {link}, {str(e) or type(e).__name__}")
+                return None, "document"
+            if not text:
+                return None, "document"
+            title, verdict = unquote(posixpath.basename(urlsplit(link).path)) or link, "document"
 
-                await new_page.wait_for_load_state("networkidle")
+        if self.page_cache is not None:
+            await self.page_cache.put(
+                link,
+                text,
+                title=title,
+                etag=headers.get("ETag"),
+                last_modified=headers.get("Last-Modified"),
+                cache_control=headers.get("Cache-Control"),
+            )
+        return {"title": title, "url": link, "content": text}, verdict
 
-                title = await new_page.title()
-                if is_pdf:
-                    text = await new_page.evaluate(
-                        """() => {
-                        const pdfViewer = document.querySelector('#plugin');
-                        if (pdfViewer) {
-                            return pdfViewer.textContent;
-                        }
-                        const pdfContent = document.querySelector('.textLayer');
-                        if (pdfContent) {
-                            return pdfContent.textContent;
-                        }
-                        return document.body.innerText;
-                    }"""
-                    )
+    async def _scrape_with_browser(self, link: str) -> Optional[dict]:
+        """
+        Scrape a page in the browser, rendering its JavaScript. Documents served with a non-HTML content type are
+        downloaded over HTTP instead.
+
+        Args:
+            link (str): The link to scrape.
+
+        Returns:
+            Optional[dict]: The scraped data, or None if the page could not be loaded.
+        """
+        self.metrics["browser"] += 1
+        try:
+            async with self.pool.page() as page:
+                response = await self.pool.load(page, link)
+                headers = response.headers if response is not None else {}
+
+                if document_type(headers.get("content-type", ""), link) not in (None, "html"):
+                    text = None
                 else:
-                    text = await new_page.evaluate(
+                    title = await page.title()
+                    text = await page.evaluate(
                         """() => {
                         const scripts = document.querySelectorAll('script, style');
                         scripts.forEach(s => s.remove());
@@ -87,56 +211,91 @@ class BingSearchClient(SearchClient):
                     }"""
                     )
 
-                await new_page.close()
-                return {"title": title, "url": link, "content": " ".join(text.split())}
+            if text is None:
+                return (await self._scrape_with_http(link))[0]
+            content = " ".join(text.split())
+            if self.page_cache is not None:
+                await self.page_cache.put(
+                    link,
+                    content,
+                    title=title,
+                    etag=headers.get("etag"),
+                    last_modified=headers.get("last-modified"),
+                    cache_control=headers.get("cache-control"),
+                )
+            return {"title": title, "url": link, "content": content}
         except Exception as e:
             logger.error(f"爬取页面失败: {str(e)}")
             return None
 
-    async def search(self, query: str, count: int = 10) -> List[SearchResult]:
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get how many pages were scraped over plain HTTP and in the browser, and the browser pool counters.
+
+        Returns:
+            Dict[str, Any]: The metrics.
+        """
+        return {**self.metrics, "pool": self.pool.stats(), "domain_policies": self.domain_policies.stats()}
+
+    async def crawl_stream(
+        self, search_results: List[SearchResult], options: Optional[SearchOptions] = None
+    ) -> AsyncGenerator[SearchResult, None]:
+        """
+        Bing results are scraped from the result pages during search, so there is nothing left to crawl.
+
+        Args:
+            search_results (List[SearchResult]): The search results.
+            options (Optional[SearchOptions], optional): The options of the request. Defaults to None.
+
+        Returns:
+            AsyncGenerator[SearchResult, None]: The search results, unchanged.
+        """
+        for search_result in search_results:
+            yield search_result
+
+    async def search(self, query: str, options: Optional[SearchOptions] = None) -> List[SearchResult]:
         """
         Search for a query on Bing and return the top results.
 
+        All state is local to the call, so concurrent searches are safe. The result page is given back to the pool
+        before the result links are scraped, so concurrent searches cannot hold every page while waiting for more,
+        and the pool bounds the open pages across all of them.
+
         Args:
             query (str): The search query.
-            count (int, optional): The number of search results to return. Defaults to 10.
+            options (Optional[SearchOptions], optional): The options of the request, of which the result count
+                applies. Defaults to None.
 
         Returns:
             List[SearchResult]: A list of SearchResult objects containing the search results.
         """
+        count = (options or SearchOptions()).count
         try:
-            await self.init_browser()
-            page = await self.context.new_page()
+            links = []
+            async with self.pool.page() as page:
+                search_url = f"https://www.bing.com/search?q={quote_plus(query)}"
+                await self.pool.load(page, search_url)
 
-            search_url = f"https://www.bing.com/search?q={query}"
-            await page.goto(search_url, wait_until="networkidle")
+                search_results = await page.query_selector_all("li.b_algo")
+                for result in search_results[:count]:
+                    try:
+                        link_element = await result.query_selector("a")
+                        if not link_element:
+                            continue
 
-            search_results = await page.query_selector_all("li.b_algo")
-            tasks = []
+                        links.append(await link_element.get_attribute("href"))
 
-            for result in search_results[:count]:
-                try:
-                    link_element = await result.query_selector("a")
-                    if not link_element:
+                    except Exception as e:
+                        logger.error(f"处理搜索结果失败: {str(e)}")
                         continue
 
-                    link = await link_element.get_attribute("href")
-                    tasks.append(self.scrape_single_page(link))
-
-                except Exception as e:
-                    logger.error(f"处理搜索结果失败: {str(e)}")
-                    continue
-
-            results = await asyncio.gather(*tasks)
-            self.results = [r for r in results if r is not None]
-
+            pages = await asyncio.gather(*(self.scrape_single_page(link) for link in links if link))
             return [
-                SearchResult(title=result["title"], content=result["content"], source=result["url"])
-                for result in self.results
+                SearchResult(title=page["title"], content=page["content"], source=page["url"])
+                for page in pages
+                if page is not None
             ]
 
         except Exception as e:
             logger.error(f"搜索请求失败: {str(e)}")
             return []
-        finally:
-            await page.close()
@@ -1,59 +1,79 @@
-from typing import List
+import asyncio
+from typing import List, Optional
 
-import requests
+import aiohttp
 
-from clients.base import SearchClient
+from clients.base import PageCache, SearchClient
+from schemas.search_options import SearchOptions
 from schemas.search_result import SearchResult
 from utils.logger import logger
 
 
 class BochaSearchClient(SearchClient):
-    def __init__(self, api_key: str, max_concurrent: int = 4, needs_crawler: bool = False, needs_filter: bool = False):
-        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-        self.session = requests.Session()
-        self.session.headers.update(headers)
-
+    def __init__(
+        self,
+        api_key: str,
+        max_concurrent: int = 4,
+        needs_crawler: bool = False,
+        needs_filter: bool = False,
+        timeout: float = 30,
+        pool_size: int = 100,
+        pool_size_per_host: int = 20,
+        page_cache: Optional[PageCache] = None,
+        max_document_bytes: int = 10 * 1024 * 1024,
+        pdf_max_pages: int = 30,
+    ):
+        self.headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
         self.url = "https://api.bochaai.com/v1/web-search"
-        self.needs_crawler = needs_crawler
 
-        super().__init__(max_concurrent, needs_crawler, needs_filter)
+        super().__init__(
+            max_concurrent,
+            needs_crawler,
+            needs_filter,
+            timeout=timeout,
+            pool_size=pool_size,
+            pool_size_per_host=pool_size_per_host,
+            page_cache=page_cache,
+            max_document_bytes=max_document_bytes,
+            pdf_max_pages=pdf_max_pages,
+        )
 
-    async def search(self, query: str, count: int = 10, freshness: str = "noLimit") -> List[SearchResult]:
+    async def search(self, query: str, options: Optional[SearchOptions] = None) -> List[SearchResult]:
         """
         Search for web pages using the Bocha Search API.
 
         Args:
             query (str): The search query.
-            count (int, optional): The number of results to return. Defaults to 10.
-            freshness (str, optional): The freshness of the results. Defaults to "noLimit".
+            options (Optional[SearchOptions], optional): The options of the request, of which the result count and
+                freshness ("noLimit" if unset) apply. Defaults to None.
 
         Returns:
             List[SearchResult]: A list of SearchResult objects.
         """
-        data = {"query": query, "freshness": freshness, "summary": True, "count": count}
-
-        response = self.session.post(self.url, json=data)
+        options = options or SearchOptions()
+        data = {"query": query, "freshness": options.freshness or "noLimit", "summary": True, "count": options.count}
 
-        if response.status_code == 200:
-            json_response = response.json()
-            try:
-                if json_response["code"] != 200 or not json_response["data"]:
-                    logger.error(f"搜索API请求失败，原因是: {response.msg or '未知错误'}")
+        session = await self._get_session()
+        try:
+            async with session.post(self.url, json=data, headers=self.headers) as response:
+                if response.status != 200:
+                    logger.error(f"搜索API请求失败，状态码: {response.status}, 错误信息: {await response.text()}")
                     return []
+                json_response = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"搜索API请求失败，原因是: {str(e) or type(e).__name__}")
+            return []
 
-                webpages = json_response["data"]["webPages"]["value"]
-                if not webpages:
-                    logger.error("未找到相关结果。")
-                    return []
-                formatted_results = [
-                    SearchResult(title=page["name"], content=page["summary"], source=page["url"]) for page in webpages
-                ]
-                if self.needs_crawler:
-                    formatted_results = await self._crawler_by_requests(formatted_results)
-                return formatted_results
-            except Exception as e:
-                logger.error(f"搜索API请求失败，原因是：搜索结果解析失败 {str(e)}")
+        try:
+            if json_response["code"] != 200 or not json_response["data"]:
+                logger.error(f"搜索API请求失败，原因是: {json_response.get('msg') or '未知错误'}")
+                return []
+
+            webpages = json_response["data"]["webPages"]["value"]
+            if not webpages:
+                logger.error("未找到相关结果。")
                 return []
-        else:
-            logger.error(f"搜索API请求失败，状态码: {response.status_code}, 错误信息: {response.text}")
+            return [SearchResult(title=page["name"], content=page["summary"], source=page["url"]) for page in webpages]
+        except Exception as e:
+            logger.error(f"搜索API请求失败，原因是：搜索结果解析失败 {str(e)}")
             return []
@@ -0,0 +1,238 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from fake_useragent import UserAgent
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    Response,
+    Route,
+)
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright
+
+from utils.logger import logger
+
+BLOCKED_RESOURCE_TYPES = {"image", "imageset", "media", "font", "beacon", "csp_report", "ping"}
+BLOCKED_HOSTS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "adservice.google.com",
+    "scorecardresearch.com",
+    "hm.baidu.com",
+    "pos.baidu.com",
+    "cnzz.com",
+    "bat.bing.com",
+)
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        max_pages: int = 5,
+        max_page_uses: int = 50,
+        block_resources: bool = True,
+        navigation_timeout: float = 15,
+        settle_timeout: float = 2,
+        min_text_length: int = 200,
+    ):
+        """
+        Pool of warm Chromium pages sharing one browser context, restarted when the browser crashes.
+
+        Args:
+            max_pages (int, optional): The maximum number of open pages. Defaults to 5.
+            max_page_uses (int, optional): The navigations after which a page is replaced. Defaults to 50.
+            block_resources (bool, optional): Whether to block images, fonts, media and ad hosts. Defaults to True.
+            navigation_timeout (float, optional): The navigation timeout in seconds. Defaults to 15.
+            settle_timeout (float, optional): How long to wait for the network to go idle after the DOM is loaded,
+                in seconds. Defaults to 2.
+            min_text_length (int, optional): The body text length below which a page is given another settle
+                period to render. Defaults to 200.
+        """
+        self.max_pages = max_pages
+        self.max_page_uses = max_page_uses
+        self.block_resources = block_resources
+        self.navigation_timeout = navigation_timeout
+        self.settle_timeout = settle_timeout
+        self.min_text_length = min_text_length
+
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._lock = asyncio.Lock()
+        self._idle: List[Page] = []
+        self._uses: Dict[Page, int] = {}
+        self._borrowed = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._closing = False
+        self.metrics = {"pages_created": 0, "pages_reused": 0, "pages_recycled": 0, "restarts": 0}
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    async def start(self):
+        """
+        Launch the browser if it is not running or has crashed.
+        """
+        if self.healthy:
+            return
+        async with self._lock:
+            if self.healthy:
+                return
+            if self.browser is not None:
+                logger.warning("浏览器已断开，重新启动")
+                self.metrics["restarts"] += 1
+                await self._shutdown()
+
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True)
+            self.context = await self.browser.new_context(
+                viewport={"width": 1920, "height": 1080}, user_agent=UserAgent().random
+            )
+            self.context.set_default_navigation_timeout(self.navigation_timeout * 1000)
+            if self.block_resources:
+                await self.context.route("**/*", self._route)
+
+    async def _route(self, route: Route):
+        request = route.request
+        host = urlsplit(request.url).hostname or ""
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+            host == blocked or host.endswith("." + blocked) for blocked in BLOCKED_HOSTS
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _shutdown(self):
+        self._idle.clear()
+        self._uses.clear()
+        try:
+            if self.browser is not None:
+                await self.browser.close()
+        except Exception as e:
+            logger.debug(f"关闭浏览器失败: {str(e)}")
+        self.browser = None
+        self.context = None
+
+    async def close(self, grace: float = 5):
+        """
+        Stop the browser once the borrowed pages are given back, or after the grace period.
+
+        Args:
+            grace (float, optional): How long to wait for the borrowed pages, in seconds. Defaults to 5.
+        """
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._drained.wait(), grace)
+        except asyncio.TimeoutError:
+            logger.warning(f"关闭浏览器时仍有 {self._borrowed} 个页面在使用")
+
+        async with self._lock:
+            self._closing = False
+            await self._shutdown()
+            if self.playwright is not None:
+                await self.playwright.stop()
+                self.playwright = None
+
+    async def _checkout(self) -> Page:
+        await self.start()
+        while self._idle:
+            page = self._idle.pop()
+            if not page.is_closed():
+                self.metrics["pages_reused"] += 1
+                return page
+            self._uses.pop(page, None)
+
+        page = await self.context.new_page()
+        self._uses[page] = 0
+        self.metrics["pages_created"] += 1
+        return page
+
+    async def _checkin(self, page: Page, reusable: bool):
+        self._uses[page] = self._uses.get(page, 0) + 1
+        if reusable and self.healthy and not page.is_closed() and self._uses[page] < self.max_page_uses:
+            try:
+                await page.goto("about:blank")
+                self._idle.append(page)
+                return
+            except Exception:
+                pass
+
+        self.metrics["pages_recycled"] += 1
+        self._uses.pop(page, None)
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Borrow a page, waiting while all pages are in use. Pages that failed or were used too often are replaced.
+        No pages are handed out while the pool is closing.
+
+        Returns:
+            AsyncIterator[Page]: The page.
+        """
+        async with self._semaphore:
+            if self._closing:
+                raise RuntimeError("浏览器正在关闭")
+            self._borrowed += 1
+            self._drained.clear()
+            try:
+                page = await self._checkout()
+                reusable = False
+                try:
+                    yield page
+                    reusable = True
+                finally:
+                    await self._checkin(page, reusable)
+            finally:
+                self._borrowed -= 1
+                if self._borrowed == 0:
+                    self._drained.set()
+
+    async def load(self, page: Page, url: str) -> Optional[Response]:
+        """
+        Navigate until the DOM is loaded, then wait briefly for the network to settle, and once more if the page
+        has not rendered enough text yet.
+
+        Args:
+            page (Page): The page.
+            url (str): The URL to load.
+
+        Returns:
+            Optional[Response]: The navigation response.
+        """
+        response = await page.goto(url, wait_until="domcontentloaded")
+        for _ in range(2):
+            try:
+                await page.wait_for_load_state("networkidle", timeout=self.settle_timeout * 1000)
+                break
+            except PlaywrightTimeoutError:
+                pass
+            text_length = await page.evaluate("() => document.body ? document.body.innerText.length : 0")
+            if text_length >= self.min_text_length:
+                break
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "idle": len(self._idle),
+            "open": len(self._uses),
+            "borrowed": self._borrowed,
+            "healthy": self.healthy,
+        }
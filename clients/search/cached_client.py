@@ -0,0 +1,86 @@
+import json
+import re
+import unicodedata
+from typing import AsyncGenerator, Dict, List, Optional
+
+from clients.base import SearchClient
+from schemas.search_options import SearchOptions
+from schemas.search_result import SearchResult
+from utils.cache import Cache
+from utils.logger import logger
+
+
+class CachedSearchClient(SearchClient):
+    def __init__(self, client: SearchClient, cache: Cache):
+        self.client = client
+        self.cache = cache
+
+        super().__init__(
+            client.max_concurrent, client.needs_crawler, client.needs_filter, filter_mode=client.filter_mode
+        )
+
+    def resolve_options(self, options: Optional[SearchOptions] = None) -> SearchOptions:
+        """
+        Fill the options a request left unset with the defaults of the wrapped client.
+
+        Args:
+            options (Optional[SearchOptions], optional): The options of the request. Defaults to None.
+
+        Returns:
+            SearchOptions: The complete options.
+        """
+        return self.client.resolve_options(options)
+
+    @staticmethod
+    def _cache_key(query: str, options: SearchOptions) -> str:
+        """
+        Build the cache key from the normalized query and the options that change the search results.
+
+        Args:
+            query (str): The search query.
+            options (SearchOptions): The options of the request.
+
+        Returns:
+            str: The cache key.
+        """
+        normalized_query = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query)).strip().lower()
+        return json.dumps([normalized_query, options.count, options.freshness], ensure_ascii=False)
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    async def crawl_stream(
+        self, search_results: List[SearchResult], options: Optional[SearchOptions] = None
+    ) -> AsyncGenerator[SearchResult, None]:
+        async for search_result in self.client.crawl_stream(search_results, options):
+            yield search_result
+
+    async def start(self):
+        await self.client.start()
+
+    async def close(self):
+        await self.client.close()
+        await super().close()
+
+    async def search(self, query: str, options: Optional[SearchOptions] = None) -> List[SearchResult]:
+        """
+        Search through the cache, falling back to the wrapped client on a miss.
+
+        Args:
+            query (str): The search query.
+            options (Optional[SearchOptions], optional): The options of the request. Defaults to None.
+
+        Returns:
+            List[SearchResult]: A list of SearchResult objects.
+        """
+        options = options or SearchOptions()
+        key = self._cache_key(query, options)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"搜索缓存命中: {query}, {self.cache.stats()}")
+            return [SearchResult(**result) for result in cached]
+
+        results = await self.client.search(query, options)
+        if results:
+            await self.cache.set(key, [result.model_dump() for result in results])
+        return results
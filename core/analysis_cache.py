@@ -0,0 +1,90 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from utils.cache import Cache
+from utils.logger import logger
+from utils.vectors import cosine, hashed_ngrams, normalize_text
+
+
+class AnalysisCache:
+    def __init__(self, cache: Cache, similarity_threshold: Optional[float] = None, max_index_size: int = 1024):
+        """
+        Cache of search-need decisions keyed on the normalized conversation and the current date.
+
+        Args:
+            cache (Cache): The backend storing the decisions.
+            similarity_threshold (Optional[float], optional): Cosine similarity of character n-gram vectors above
+                which a near-identical conversation reuses a cached decision. None disables the similarity lookup.
+                Defaults to None.
+            max_index_size (int, optional): The number of recent conversations kept in the similarity index.
+                Defaults to 1024.
+        """
+        self.cache = cache
+        self.similarity_threshold = similarity_threshold
+        self.max_index_size = max_index_size
+        self._index: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def _cache_key(question: str, cur_date: str) -> str:
+        digest = hashlib.sha256(normalize_text(question).encode("utf-8")).hexdigest()
+        return f"analysis:{cur_date}:{digest}"
+
+    def _nearest(self, vector: Dict[int, float], cur_date: str) -> Optional[str]:
+        """
+        Find the most similar indexed conversation of the same date above the similarity threshold.
+
+        Args:
+            vector (Dict[int, float]): The embedded conversation.
+            cur_date (str): The current date.
+
+        Returns:
+            Optional[str]: The cache key of the nearest conversation, or None.
+        """
+        best_key, best_score = None, self.similarity_threshold
+        for key, (date, other) in self._index.items():
+            if date != cur_date:
+                continue
+            score = cosine(vector, other)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    async def get(self, question: str, cur_date: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached decision for an identical or, if enabled, near-identical conversation.
+
+        Args:
+            question (str): The conversation text.
+            cur_date (str): The current date.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached decision, or None.
+        """
+        result = await self.cache.get(self._cache_key(question, cur_date))
+        if result is not None or not self.similarity_threshold:
+            return result
+
+        key = self._nearest(hashed_ngrams(question), cur_date)
+        if key is None:
+            return None
+        logger.debug(f"分析缓存相似命中: {key}")
+        return await self.cache.get(key)
+
+    async def set(self, question: str, cur_date: str, result: Dict[str, Any]):
+        """
+        Store the decision for a conversation.
+
+        Args:
+            question (str): The conversation text.
+            cur_date (str): The current date.
+            result (Dict[str, Any]): The decision with needs_search, search_queries and reason.
+        """
+        key = self._cache_key(question, cur_date)
+        await self.cache.set(key, result)
+
+        if self.similarity_threshold:
+            self._index[key] = (cur_date, hashed_ngrams(question))
+            self._index.move_to_end(key)
+            while len(self._index) > self.max_index_size:
+                self._index.popitem(last=False)
@@ -1,98 +1,426 @@
 import asyncio
 from datetime import datetime
-from typing import Any, AsyncGenerator, List, Optional
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
 
+from clients.base.governor import Priority
 from clients.base.llm_client import LLMClient
 from clients.base.search_client import SearchClient
 from clients.llm.prompts import (
     ANALYZE_SEARCH_PROMPT,
+    FILTER_RESULTS_BATCH_PROMPT,
     FILTER_RESULTS_PROMPT,
     GENERATE_ANSWER_PROMPT,
     GENERATE_ANSWER_WITH_SEARCH_PROMPT,
 )
+from core.analysis_cache import AnalysisCache
+from core.classifier import DecisionLog, Prediction, SearchNeedClassifier
+from core.context_packer import ContextPacker, format_search_results
 from schemas.chat_message import ChatMessage
+from schemas.filtered_result import FilteredResults
+from schemas.search_options import SearchOptions
 from schemas.search_result import SearchResult
+from utils.dedup import merge_search_results
 from utils.logger import logger
+from utils.passages import select_passages
+from utils.tokens import count_tokens
+from utils.workers import cpu_pool
 
 
 class Assistant:
-    def __init__(self, analysis_llm: LLMClient, answer_llm: LLMClient, search_client: SearchClient):
+    def __init__(
+        self,
+        analysis_llm: LLMClient,
+        answer_llm: LLMClient,
+        search_client: SearchClient,
+        max_concurrent_searches: int = 8,
+        search_timeout: Optional[float] = 15,
+        search_deadline: Optional[float] = 20,
+        crawl_deadline: Optional[float] = 30,
+        passage_token_budget: Optional[int] = 1000,
+        filter_batch_size: int = 8,
+        filter_batch_token_budget: int = 6000,
+        filter_batch_linger: float = 0.5,
+        analysis_cache: Optional[AnalysisCache] = None,
+        context_packer: Optional[ContextPacker] = None,
+        speculative_answer: bool = False,
+        speculative_search: bool = False,
+        classifier: Optional[SearchNeedClassifier] = None,
+        decision_log: Optional[DecisionLog] = None,
+    ):
         self.analysis_llm = analysis_llm
         self.answer_llm = answer_llm
         self.search_client = search_client
 
-    async def _analyze_search_need(self, messages: List[ChatMessage]) -> dict:
+        self.search_semaphore = asyncio.Semaphore(max_concurrent_searches)
+        self.search_timeout = search_timeout
+        self.search_deadline = search_deadline
+        self.crawl_deadline = crawl_deadline
+        self.passage_token_budget = passage_token_budget
+        self.filter_batch_size = filter_batch_size
+        self.filter_batch_token_budget = filter_batch_token_budget
+        self.filter_batch_linger = filter_batch_linger
+
+        self.analysis_cache = analysis_cache
+        self.context_packer = context_packer
+
+        self.speculative_answer = speculative_answer
+        self.speculative_search = speculative_search
+
+        self.classifier = classifier
+        self.decision_log = decision_log
+        self._background_tasks = set()
+
+    async def _analyze_search_need(
+        self, messages: List[ChatMessage], on_query: Optional[Callable[[str], None]] = None
+    ) -> dict:
         """
         Analyze the search need and decide whether to perform search.
 
         Args:
             messages (List[ChatMessage]): The chat messages.
+            on_query (Optional[Callable[[str], None]], optional): Called with each search query as soon as the
+                analysis stream has produced it, before the whole decision is known. Defaults to None.
 
         Returns:
             dict: The analysis result.
         """
         logger.info("分析搜索需求...")
         question = "\n".join([f"{msg.role}: {msg.content}" for msg in messages])
-        result = await self.analysis_llm.generate_dict_response(
-            ANALYZE_SEARCH_PROMPT, question=question, cur_date=datetime.now().strftime("%Y-%m-%d")
-        )
+        cur_date = datetime.now().strftime("%Y-%m-%d")
+
+        if self.analysis_cache is not None:
+            result = await self.analysis_cache.get(question, cur_date)
+            if result is not None:
+                logger.info(f"分析搜索需求结果(缓存): {result}")
+                return result
+
+        prediction = None
+        user_message = messages[-1].content if messages and messages[-1].role == "user" else ""
+        if self.classifier is not None and user_message and sum(msg.role == "user" for msg in messages) == 1:
+            prediction = self.classifier.predict(user_message)
+            if prediction.confident:
+                result = self.classifier.decision(user_message, prediction)
+                logger.info(f"分析搜索需求结果(分类器): {result}")
+                if self.classifier.should_shadow():
+                    task = asyncio.create_task(self._analyze_with_llm(question, cur_date, user_message, prediction))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._on_shadow_done)
+                if self.decision_log is not None:
+                    await self.decision_log.append(user_message, result, prediction.source, prediction)
+                return result
+
+        return await self._analyze_with_llm(question, cur_date, user_message, prediction, on_query)
+
+    def _on_shadow_done(self, task: asyncio.Task):
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"分类器影子评估失败: {type(task.exception()).__name__}: {task.exception()}")
+
+    async def _analyze_with_llm(
+        self,
+        question: str,
+        cur_date: str,
+        user_message: str,
+        prediction: Optional[Prediction] = None,
+        on_query: Optional[Callable[[str], None]] = None,
+    ) -> dict:
+        """
+        Ask the analysis LLM for the search decision, and record it for the classifier.
+
+        Args:
+            question (str): The conversation text.
+            cur_date (str): The current date.
+            user_message (str): The latest user message.
+            prediction (Optional[Prediction], optional): The classifier prediction to compare. Defaults to None.
+            on_query (Optional[Callable[[str], None]], optional): Called with each search query as soon as it has
+                been streamed. Defaults to None, which waits for the whole response instead.
+
+        Returns:
+            dict: The analysis result.
+        """
+        if on_query is None:
+            result = await self.analysis_llm.generate_dict_response(
+                ANALYZE_SEARCH_PROMPT, priority=Priority.ANALYSIS, question=question, cur_date=cur_date
+            )
+        else:
+            result = await self._stream_analysis(question, cur_date, on_query)
         logger.info(f"分析搜索需求结果: {result}")
+
+        if self.analysis_cache is not None and "needs_search" in result:
+            await self.analysis_cache.set(question, cur_date, result)
+        if prediction is not None:
+            self.classifier.record(prediction, result)
+        if self.decision_log is not None and user_message and "needs_search" in result:
+            await self.decision_log.append(user_message, result, "llm", prediction)
         return result
 
-    async def _perform_search(self, search_queries: List[str]) -> List[SearchResult]:
+    async def _stream_analysis(self, question: str, cur_date: str, on_query: Callable[[str], None]) -> dict:
         """
-        Perform search based on the search queries.
+        Stream the analysis response and hand over each search query the moment it is complete.
+
+        Queries are not handed over once the response has said that no search is needed. Streams are retried only
+        until their first event, so a response that turns out unusable after events have been streamed is asked
+        for again without streaming.
 
         Args:
-            search_queries (List[str]): The search queries.
+            question (str): The conversation text.
+            cur_date (str): The current date.
+            on_query (Callable[[str], None]): Called with each search query.
 
         Returns:
-            List[SearchResult]: The search results.
+            dict: The analysis result, or an empty dict if the response is not a JSON object.
+        """
+        result = {}
+        needs_search = None
+        received = False
+        try:
+            async for path, value in self.analysis_llm.generate_json_events(
+                ANALYZE_SEARCH_PROMPT, priority=Priority.ANALYSIS, question=question, cur_date=cur_date
+            ):
+                received = True
+                if path == ("needs_search",):
+                    needs_search = value
+                elif len(path) == 2 and path[0] == "search_queries" and isinstance(value, str) and value.strip():
+                    if needs_search is not False:
+                        on_query(value)
+                elif path == ():
+                    result = value if isinstance(value, dict) else {}
+        except ValueError:
+            if not received:
+                return {}
+
+        if received and "needs_search" not in result:
+            logger.warning("流式分析搜索需求结果无效，重新分析")
+            result = await self.analysis_llm.generate_dict_response(
+                ANALYZE_SEARCH_PROMPT, priority=Priority.ANALYSIS, question=question, cur_date=cur_date
+            )
+        return result
+
+    def _start_search(self, query: str, options: Optional[SearchOptions] = None) -> asyncio.Task:
         """
-        all_results = []
-        for query in search_queries:
-            results = await self._search_and_filter(query)
-            all_results.extend(results)
+        Start searching for a query within the assistant-wide concurrency budget and the per-query timeout.
 
-        return all_results
+        Args:
+            query (str): The search query.
+            options (Optional[SearchOptions], optional): The search options of the request. Defaults to None.
 
-    async def _perform_search_with_concurrent(self, search_queries: List[str]) -> List[SearchResult]:
+        Returns:
+            asyncio.Task: The task resolving to the search results.
         """
-        Perform search based on the search queries using concurrent tasks.
+
+        async def search_with_budget() -> List[SearchResult]:
+            async with self.search_semaphore:
+                return await asyncio.wait_for(self.search_client.search(query, options), timeout=self.search_timeout)
+
+        return asyncio.create_task(search_with_budget())
+
+    async def _perform_search(
+        self,
+        search_queries: List[str],
+        options: Optional[SearchOptions] = None,
+        started: Optional[Dict[str, asyncio.Task]] = None,
+        speculative_query: Optional[str] = None,
+    ) -> List[SearchResult]:
+        """
+        Perform search based on the search queries, then merge, crawl and filter the results.
 
         Args:
             search_queries (List[str]): The search queries.
+            options (Optional[SearchOptions], optional): The search options of the request. Defaults to None.
+            started (Optional[Dict[str, asyncio.Task]], optional): The searches already started for some of the
+                queries. Defaults to None.
+            speculative_query (Optional[str], optional): A query searched before the queries were known, whose
+                results are ranked after theirs. Defaults to None.
 
-        return:
+        Returns:
             List[SearchResult]: The search results.
         """
-        search_tasks = []
-        for query in search_queries:
-            search_tasks.append(self._search_and_filter(query))
+        secondary_queries = ()
+        if speculative_query and speculative_query not in search_queries:
+            search_queries = [*search_queries, speculative_query]
+            secondary_queries = (speculative_query,)
+        results_by_query = await self._search_concurrently(search_queries, options, started)
+        merged_results = merge_search_results(results_by_query, secondary_queries=secondary_queries)
+        logger.debug(
+            f"搜索结果去重: {sum(len(r) for r in results_by_query.values())} -> "
+            f"{sum(len(r) for r in merged_results.values())}"
+        )
+        search_results = await self._crawl_and_filter(merged_results, options)
+        return self._pack_search_results(search_results)
+
+    def _pack_search_results(self, search_results: List[SearchResult]) -> List[SearchResult]:
+        """
+        Trim the search results to the answer model's context budget and report what was dropped.
+
+        Args:
+            search_results (List[SearchResult]): The search results, best-ranked first.
 
-        results_list = await asyncio.gather(*search_tasks)
+        Returns:
+            List[SearchResult]: The search results that fit the budget.
+        """
+        if self.context_packer is None or not search_results:
+            return search_results
+
+        packed = self.context_packer.pack(search_results)
+        if packed.dropped or packed.truncated:
+            logger.warning(
+                f"搜索结果超出上下文预算: 保留 {len(packed.results)} 个, 截断 {len(packed.truncated)} 个, "
+                f"丢弃 {[result.source for result in packed.dropped]}"
+            )
+        logger.debug(f"搜索结果上下文 tokens: {packed.tokens}")
+        return packed.results
+
+    async def _search_concurrently(
+        self,
+        search_queries: List[str],
+        options: Optional[SearchOptions] = None,
+        started: Optional[Dict[str, asyncio.Task]] = None,
+    ) -> Dict[str, List[SearchResult]]:
+        """
+        Perform search based on the search queries using concurrent tasks.
 
-        all_results = []
-        for results in results_list:
-            all_results.extend(results)
+        Queries share the assistant-wide search concurrency budget, each one is bounded by the per-query
+        timeout, and whatever has finished when the deadline expires is returned while the rest is cancelled.
 
-        return all_results
+        Args:
+            search_queries (List[str]): The search queries.
+            options (Optional[SearchOptions], optional): The search options of the request. Defaults to None.
+            started (Optional[Dict[str, asyncio.Task]], optional): The searches already started for some of the
+                queries, which are reused; those for other queries are cancelled. Defaults to None.
 
-    async def _search_and_filter(self, query: str) -> List[SearchResult]:
+        Returns:
+            Dict[str, List[SearchResult]]: The search results of each finished query, in query order.
         """
-        Perform search based on the search query.
+        options = self.search_client.resolve_options(options)
+        started = started or {}
+        tasks = {
+            query: started.get(query) or self._start_search(query, options) for query in dict.fromkeys(search_queries)
+        }
+        for query, task in started.items():
+            if query not in tasks:
+                task.cancel()
+        if not tasks:
+            return {}
+
+        try:
+            deadline = self.search_deadline if options.search_deadline is None else options.search_deadline
+            _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+        if pending:
+            logger.warning(f"{len(pending)} 个搜索未在截止时间内完成，使用部分结果")
+
+        results_by_query = {}
+        for query, task in tasks.items():
+            if task in pending:
+                continue
+            if task.exception() is not None:
+                logger.error(f"搜索失败: {query}, {type(task.exception()).__name__}: {task.exception()}")
+                continue
+            logger.debug(f"搜索结果数: {query}, {len(task.result())}")
+            results_by_query[query] = task.result()
+
+        return results_by_query
+
+    async def _crawl_and_filter(
+        self, results_by_query: Dict[str, List[SearchResult]], options: Optional[SearchOptions] = None
+    ) -> List[SearchResult]:
+        """
+        Crawl the merged search results and filter each page against its query as soon as it is fetched.
+
+        Pages flow from the crawler straight into passage selection and filtering, so fast pages are not held back
+        by slow ones. In batch mode, a partial batch is filtered once it has waited filter_batch_linger seconds, and
+        all partial batches are filtered filter_batch_linger seconds before the crawl deadline.
+        When the crawl deadline expires, the remaining work is cancelled; the pages that are ready are returned, and
+        the results still being crawled or filtered fall back to their search summaries.
 
         Args:
-            query (str): The search query.
+            results_by_query (Dict[str, List[SearchResult]]): The merged search results of each query.
+            options (Optional[SearchOptions], optional): The search options of the request. Defaults to None.
 
         Returns:
-            List[SearchResult]: The search results.
+            List[SearchResult]: The crawled and filtered search results, in their original order.
         """
-        results = await self.search_client.search(query)
-        logger.debug(f"搜索结果数: {len(results)}")
-        if self.search_client.needs_filter:
-            return await self._filter_search_results(results, query)
-        return results
+        options = self.search_client.resolve_options(options)
+        results = [result for query_results in results_by_query.values() for result in query_results]
+        if not results:
+            return []
+
+        queries = {id(result): query for query, query_results in results_by_query.items() for result in query_results}
+        order = {id(result): index for index, result in enumerate(results)}
+        summaries = {id(result): result.model_copy() for result in results}
+        ready: Dict[int, SearchResult] = {}
+        finished = set()
+        filter_tasks = []
+
+        batch_mode = options.filter_mode == "batch"
+        batches: Dict[str, List[SearchResult]] = {}
+
+        async def filter_results(query_results: List[SearchResult], query: str):
+            if batch_mode:
+                filtered_results = await self._filter_search_results_batch(query_results, query)
+            else:
+                filtered_results = await self._filter_search_results(query_results, query)
+            ids = {result.source: id(result) for result in query_results}
+            for filtered_result in filtered_results:
+                ready[ids[filtered_result.source]] = filtered_result
+            finished.update(ids.values())
+
+        loop = asyncio.get_running_loop()
+        timers: List[asyncio.TimerHandle] = []
+
+        def flush(query: str, batch: Optional[List[SearchResult]] = None):
+            if query not in batches or (batch is not None and batches[query] is not batch):
+                return
+            filter_tasks.append(asyncio.create_task(filter_results(batches.pop(query), query)))
+
+        def flush_all():
+            for query in list(batches):
+                flush(query)
+
+        async def pipeline():
+            async for result in self.search_client.crawl_stream(results, options):
+                query = queries[id(result)]
+                if self.passage_token_budget:
+                    result.content = await cpu_pool.run(
+                        select_passages, result.content, query, self.passage_token_budget
+                    )
+                if not options.needs_filter:
+                    ready[id(result)] = result
+                    finished.add(id(result))
+                elif not batch_mode:
+                    filter_tasks.append(asyncio.create_task(filter_results([result], query)))
+                else:
+                    if query not in batches:
+                        batches[query] = []
+                        timers.append(loop.call_later(self.filter_batch_linger, flush, query, batches[query]))
+                    batches[query].append(result)
+                    if len(batches[query]) >= self.filter_batch_size:
+                        flush(query)
+            flush_all()
+            await asyncio.gather(*filter_tasks)
+
+        try:
+            deadline = self.crawl_deadline if options.crawl_deadline is None else options.crawl_deadline
+            if batch_mode and deadline is not None:
+                timers.append(loop.call_later(max(0.0, deadline - self.filter_batch_linger), flush_all))
+            await asyncio.wait_for(pipeline(), timeout=deadline)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"爬取和过滤未在截止时间内完成，使用已完成的 {len(finished)}/{len(results)} 个结果，其余使用搜索摘要"
+            )
+        finally:
+            for timer in timers:
+                timer.cancel()
+            for task in filter_tasks:
+                task.cancel()
+
+        for key, summary in summaries.items():
+            if key not in finished:
+                ready[key] = summary
+        return [ready[key] for key in sorted(ready, key=order.get)]
 
     async def _filter_search_results(self, results: List[SearchResult], query: str) -> List[SearchResult]:
         """
@@ -111,7 +439,7 @@ class Assistant:
         async def filter_result(result: SearchResult):
             try:
                 filtered_content = await self.analysis_llm.generate_response(
-                    FILTER_RESULTS_PROMPT, query=query, content=result.content
+                    FILTER_RESULTS_PROMPT, priority=Priority.FILTER, query=query, content=result.content
                 )
                 return SearchResult(title=result.title, content=filtered_content.strip(), source=result.source)
             except Exception as e:
@@ -122,6 +450,73 @@ class Assistant:
 
         return [result for result in filtered_results if result is not None]
 
+    def _split_filter_batches(self, results: List[SearchResult]) -> List[List[SearchResult]]:
+        """
+        Split search results into batches whose contents fit the batch filter token budget.
+
+        Args:
+            results (List[SearchResult]): The search results.
+
+        Returns:
+            List[List[SearchResult]]: The batches, each holding at least one result.
+        """
+        batches, batch, batch_tokens = [], [], 0
+        for result in results:
+            tokens = count_tokens(result.content)
+            if batch and (
+                batch_tokens + tokens > self.filter_batch_token_budget or len(batch) >= self.filter_batch_size
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(result)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _filter_search_results_batch(self, results: List[SearchResult], query: str) -> List[SearchResult]:
+        """
+        Filter search results based on the search query, packing several results into each LLM call.
+
+        Results missing from a batch response, or from a response that cannot be parsed, are filtered one by one.
+
+        Args:
+            results (List[SearchResult]): The search results.
+            query (str): The search query.
+
+        Returns:
+            List[SearchResult]: The filtered search results.
+        """
+        if not results:
+            return []
+
+        async def filter_batch(batch: List[SearchResult]) -> List[SearchResult]:
+            content = "\n\n".join(f"[{i}] {result.title}\n{result.content}" for i, result in enumerate(batch, 1))
+            try:
+                response = await self.analysis_llm.generate_dict_response(
+                    FILTER_RESULTS_BATCH_PROMPT, priority=Priority.FILTER, query=query, content=content
+                )
+                filtered = {item.id: item.content for item in FilteredResults.model_validate(response).results}
+            except Exception as e:
+                logger.error(f"批量过滤搜索结果解析失败，逐条过滤: {str(e)}")
+                filtered = {}
+
+            missing = [result for i, result in enumerate(batch, 1) if not filtered.get(i, "").strip()]
+            fallback = {result.source: result for result in await self._filter_search_results(missing, query)}
+
+            filtered_results = []
+            for i, result in enumerate(batch, 1):
+                if result.source in fallback:
+                    filtered_results.append(fallback[result.source])
+                elif filtered.get(i, "").strip():
+                    filtered_results.append(
+                        SearchResult(title=result.title, content=filtered[i].strip(), source=result.source)
+                    )
+            return filtered_results
+
+        filtered_batches = await asyncio.gather(*(filter_batch(batch) for batch in self._split_filter_batches(results)))
+        return [result for batch in filtered_batches for result in batch]
+
     async def _generate_answer(
         self, messages: List[ChatMessage], search_results: Optional[List[SearchResult]] = None
     ) -> str:
@@ -138,20 +533,18 @@ class Assistant:
         question = "\n".join([f"{msg.role}: {msg.content}" for msg in messages])
 
         if search_results:
-            search_results = "\n".join(
-                [
-                    f"[webpage {i} begin]...[webpage {i} end]{r.model_dump_json()}"
-                    for i, r in enumerate(search_results, 1)
-                ]
-            )
+            search_results = format_search_results(search_results)
             return await self.answer_llm.generate_response(
                 GENERATE_ANSWER_WITH_SEARCH_PROMPT,
+                priority=Priority.ANSWER,
                 question=question,
                 search_results=search_results,
                 cur_date=datetime.now().strftime("%Y-%m-%d"),
             )
         else:
-            return await self.answer_llm.generate_response(GENERATE_ANSWER_PROMPT, question=question)
+            return await self.answer_llm.generate_response(
+                GENERATE_ANSWER_PROMPT, priority=Priority.ANSWER, question=question
+            )
 
     async def _generate_answer_with_stream(
         self, messages: List[ChatMessage], search_results: Optional[List[SearchResult]] = None
@@ -169,12 +562,7 @@ class Assistant:
         question = "\n".join([f"{msg.role}: {msg.content}" for msg in messages])
 
         if search_results:
-            search_results = "\n".join(
-                [
-                    f"[webpage {i} begin]...[webpage {i} end]{r.model_dump_json()}"
-                    for i, r in enumerate(search_results, 1)
-                ]
-            )
+            search_results = format_search_results(search_results)
             async for chunk in self.answer_llm.generate_stream_response(
                 GENERATE_ANSWER_WITH_SEARCH_PROMPT,
                 question=question,
@@ -186,53 +574,161 @@ class Assistant:
             async for chunk in self.answer_llm.generate_stream_response(GENERATE_ANSWER_PROMPT, question=question):
                 yield chunk
 
-    async def answer_question(self, messages: List[ChatMessage]) -> str:
+    def _speculative_query(self, messages: List[ChatMessage]) -> Optional[str]:
         """
-        Answer a question based on the chat messages.
+        Get the raw user message to search for before the analysis has produced search queries.
 
         Args:
             messages (List[ChatMessage]): The chat messages.
 
         Returns:
-            str: The generated answer.
+            Optional[str]: The last user message, or None if speculative search is off.
+        """
+        if not self.speculative_search or not messages or messages[-1].role != "user":
+            return None
+        return messages[-1].content.strip() or None
+
+    @staticmethod
+    async def _buffer_stream(stream: AsyncGenerator[str, Any], queue: asyncio.Queue):
+        try:
+            async for chunk in stream:
+                queue.put_nowait(chunk)
+        finally:
+            queue.put_nowait(None)
+
+    @staticmethod
+    async def _drain_stream(task: asyncio.Task, queue: asyncio.Queue) -> AsyncGenerator[str, Any]:
         """
-        search_decision = await self._analyze_search_need(messages)
+        Replay the chunks a speculative stream has buffered so far, then follow it until it ends.
 
-        if search_decision["needs_search"] and search_decision["search_queries"]:
-            search_results = await self._perform_search(search_decision["search_queries"])
-            return await self._generate_answer(messages, search_results)
-        else:
-            return await self._generate_answer(messages)
+        Args:
+            task (asyncio.Task): The task buffering the stream.
+            queue (asyncio.Queue): The buffered chunks, terminated by None.
 
-    async def answer_question_with_stream(self, messages: List[ChatMessage]) -> AsyncGenerator[str, Any]:
+        Returns:
+            AsyncGenerator[str, Any]: The chunks of the stream.
+        """
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        await task
+
+    async def answer_question(self, messages: List[ChatMessage], options: Optional[SearchOptions] = None) -> str:
+        """
+        Answer a question based on the chat messages.
+
+        Args:
+            messages (List[ChatMessage]): The chat messages.
+            options (Optional[SearchOptions], optional): The search options of this request, defaulting to those of
+                the search client. Defaults to None.
+
+        Returns:
+            str: The generated answer.
+        """
+        options = self.search_client.resolve_options(options)
+        speculative_answer = None
+        if self.speculative_answer:
+            speculative_answer = asyncio.create_task(self._generate_answer(messages))
+        speculative_query = self._speculative_query(messages)
+        started: Dict[str, asyncio.Task] = {}
+        if speculative_query:
+            started[speculative_query] = self._start_search(speculative_query, options)
+
+        def on_query(query: str):
+            if query not in started:
+                started[query] = self._start_search(query, options)
+
+        try:
+            search_decision = await self._analyze_search_need(messages, on_query)
+
+            if search_decision.get("needs_search", False) and search_decision.get("search_queries"):
+                if speculative_answer is not None:
+                    speculative_answer.cancel()
+                search_results = await self._perform_search(
+                    search_decision["search_queries"], options, started, speculative_query
+                )
+                return await self._generate_answer(messages, search_results)
+            else:
+                for task in started.values():
+                    task.cancel()
+                if speculative_answer is not None:
+                    return await speculative_answer
+                return await self._generate_answer(messages)
+        finally:
+            for task in (speculative_answer, *started.values()):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def answer_question_with_stream(
+        self, messages: List[ChatMessage], options: Optional[SearchOptions] = None
+    ) -> AsyncGenerator[str, Any]:
         """
         Answer a question based on the chat messages using streaming.
 
         Args:
             messages (List[ChatMessage]): The chat messages.
+            options (Optional[SearchOptions], optional): The search options of this request, defaulting to those of
+                the search client. Defaults to None.
 
         Returns:
             AsyncGenerator[str, Any]: The generated answer using streaming.
         """
-        search_decision = await self._analyze_search_need(messages)
+        options = self.search_client.resolve_options(options)
+        speculative_answer = None
+        if self.speculative_answer:
+            answer_queue = asyncio.Queue()
+            speculative_answer = asyncio.create_task(
+                self._buffer_stream(self._generate_answer_with_stream(messages), answer_queue)
+            )
+        speculative_query = self._speculative_query(messages)
+        started: Dict[str, asyncio.Task] = {}
+        if speculative_query:
+            started[speculative_query] = self._start_search(speculative_query, options)
 
-        if search_decision["needs_search"] and search_decision["search_queries"]:
-            yield "[SEARCH]"
+        def on_query(query: str):
+            if query not in started:
+                started[query] = self._start_search(query, options)
 
-            yield "Searching...\n"
-            for search_query in search_decision["search_queries"]:
-                yield f"- {search_query}\n"
+        try:
+            search_decision = await self._analyze_search_need(messages, on_query)
 
-            search_results = await self._perform_search(search_decision["search_queries"])
-            for i, result in enumerate(search_results, 1):
-                yield f"{i}. [{result.title}]({result.source})\n"
+            if search_decision.get("needs_search", False) and search_decision.get("search_queries"):
+                if speculative_answer is not None:
+                    speculative_answer.cancel()
 
-            yield "[/SEARCH]"
+                yield "[SEARCH]"
 
-            async for chunk in self._generate_answer_with_stream(messages, search_results):
-                yield chunk
-        else:
-            async for chunk in self._generate_answer_with_stream(messages):
-                yield chunk
+                yield "Searching...\n"
+                for search_query in search_decision["search_queries"]:
+                    yield f"- {search_query}\n"
+                if speculative_query and speculative_query not in search_decision["search_queries"]:
+                    yield f"- {speculative_query}\n"
+
+                search_results = await self._perform_search(
+                    search_decision["search_queries"], options, started, speculative_query
+                )
+                for i, result in enumerate(search_results, 1):
+                    yield f"{i}. [{result.title}]({result.source})\n"
+
+                yield "[/SEARCH]"
+
+                async for chunk in self._generate_answer_with_stream(messages, search_results):
+                    yield chunk
+            else:
+                for task in started.values():
+                    task.cancel()
+
+                if speculative_answer is not None:
+                    async for chunk in self._drain_stream(speculative_answer, answer_queue):
+                        yield chunk
+                else:
+                    async for chunk in self._generate_answer_with_stream(messages):
+                        yield chunk
+        finally:
+            for task in (speculative_answer, *started.values()):
+                if task is not None and not task.done():
+                    task.cancel()
 
         yield "[DONE]"
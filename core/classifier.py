@@ -0,0 +1,315 @@
+import asyncio
+import json
+import math
+import random
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from utils.logger import logger
+from utils.vectors import hashed_ngrams, normalize_text
+
+SMALL_TALK_PATTERN = re.compile(
+    r"^(你好|您好|嗨|哈喽|hi|hello|hey|在吗|在不在|早上好|晚上好|晚安|谢谢|多谢|感谢|谢啦|thanks|thank you|thx|"
+    r"再见|拜拜|bye|好的|好|嗯|嗯嗯|ok|okay|收到|明白了|哈哈+|你是谁|你叫什么名字?|who are you)[\s!！。.~～?？,，]*$"
+)
+TIME_SENSITIVE_PATTERN = re.compile(
+    r"(今天|今日|昨天|昨日|明天|本周|这周|最新|近期|最近|实时|新闻|天气|股价|汇率|比分|热搜|"
+    r"\b(latest|today|yesterday|tomorrow|this week|news|weather|stock price|exchange rate)\b)"
+)
+CLAUSE_SEPARATOR_PATTERN = re.compile(r"[\n。!;,、]|\.\s")
+RULE_MAX_LENGTH = 40
+RULE_PROBABILITY = 0.98
+
+
+class LinearModel:
+    def __init__(
+        self,
+        weights: Optional[Dict[int, float]] = None,
+        bias: float = 0.0,
+        ngram_sizes: Tuple[int, ...] = (2, 3),
+        dims: int = 1 << 18,
+    ):
+        """
+        Logistic regression over hashed character n-grams.
+
+        Args:
+            weights (Optional[Dict[int, float]], optional): The weight of each hash bucket. Defaults to None.
+            bias (float, optional): The bias. Defaults to 0.0.
+            ngram_sizes (Tuple[int, ...], optional): The character n-gram sizes. Defaults to (2, 3).
+            dims (int, optional): The number of hash buckets. Defaults to 2**18.
+        """
+        self.weights = weights or {}
+        self.bias = bias
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.dims = dims
+
+    def features(self, text: str) -> Dict[int, float]:
+        return hashed_ngrams(text, self.ngram_sizes, self.dims)
+
+    def predict_proba(self, text: str) -> float:
+        """
+        Get the probability that the text needs a search.
+
+        Args:
+            text (str): The user message.
+
+        Returns:
+            float: The probability.
+        """
+        score = self.bias + sum(value * self.weights.get(index, 0.0) for index, value in self.features(text).items())
+        return 1 / (1 + math.exp(-max(-30.0, min(30.0, score))))
+
+    @classmethod
+    def train(
+        cls,
+        examples: Iterable[Tuple[str, bool]],
+        epochs: int = 10,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0,
+        **kwargs: Any,
+    ) -> "LinearModel":
+        """
+        Fit a model with stochastic gradient descent on the log loss.
+
+        Args:
+            examples (Iterable[Tuple[str, bool]]): The user messages and whether they needed a search.
+            epochs (int, optional): The passes over the examples. Defaults to 10.
+            learning_rate (float, optional): The initial step size, decayed per epoch. Defaults to 0.5.
+            l2 (float, optional): The L2 regularization strength. Defaults to 1e-5.
+            seed (int, optional): The shuffling seed. Defaults to 0.
+            **kwargs (Any): The feature parameters passed to the model.
+
+        Returns:
+            LinearModel: The trained model.
+        """
+        model = cls(**kwargs)
+        data = [(model.features(text), 1.0 if label else 0.0) for text, label in examples]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+            for features, label in data:
+                score = model.bias + sum(value * model.weights.get(index, 0.0) for index, value in features.items())
+                gradient = 1 / (1 + math.exp(-max(-30.0, min(30.0, score)))) - label
+                model.bias -= rate * gradient
+                for index, value in features.items():
+                    weight = model.weights.get(index, 0.0)
+                    model.weights[index] = weight - rate * (gradient * value + l2 * weight)
+        return model
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"ngram_sizes": self.ngram_sizes, "dims": self.dims, "bias": self.bias, "weights": self.weights}, f
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LinearModel":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            weights={int(index): weight for index, weight in data["weights"].items()},
+            bias=data["bias"],
+            ngram_sizes=tuple(data["ngram_sizes"]),
+            dims=data["dims"],
+        )
+
+
+class Prediction(BaseModel):
+    needs_search: bool
+    probability: float
+    confident: bool
+    source: str
+
+
+class SearchNeedClassifier:
+    def __init__(self, model: Optional[LinearModel] = None, threshold: float = 0.9, shadow_rate: float = 0.0):
+        """
+        Local pre-classifier deciding obvious search needs without the analysis LLM.
+
+        Rules catch small talk and short single-clause time-sensitive questions, which can be searched for as is;
+        a linear model, when provided, scores the rest. Rule hits get a probability of RULE_PROBABILITY, or
+        1 - RULE_PROBABILITY, and like model scores a prediction is confident when its probability is at least
+        threshold or at most 1 - threshold.
+
+        Args:
+            model (Optional[LinearModel], optional): The trained model. Defaults to None, which uses the rules only.
+            threshold (float, optional): The confidence threshold. Defaults to 0.9.
+            shadow_rate (float, optional): The share of confident predictions also checked against the LLM in the
+                background to measure agreement. Defaults to 0.0.
+        """
+        self.model = model
+        self.threshold = threshold
+        self.shadow_rate = shadow_rate
+        self.metrics = {
+            "fast_path": 0,
+            "fallback": 0,
+            "compared": 0,
+            "agreed": 0,
+            "confident_compared": 0,
+            "confident_agreed": 0,
+        }
+
+    def predict(self, question: str) -> Prediction:
+        """
+        Predict whether a user message needs a search.
+
+        Args:
+            question (str): The latest user message.
+
+        Returns:
+            Prediction: The prediction.
+        """
+        text = normalize_text(question)
+        if SMALL_TALK_PATTERN.match(text):
+            return self._prediction(1 - RULE_PROBABILITY, "rules")
+        if TIME_SENSITIVE_PATTERN.search(text) and self._is_single_query(text):
+            return self._prediction(RULE_PROBABILITY, "rules")
+        if self.model is None:
+            return Prediction(needs_search=False, probability=0.5, confident=False, source="model")
+        return self._prediction(self.model.predict_proba(text), "model")
+
+    @staticmethod
+    def _is_single_query(text: str) -> bool:
+        """
+        Check whether a normalized message is short and a single clause, so that it can be searched for as is.
+
+        Args:
+            text (str): The normalized message.
+
+        Returns:
+            bool: True if the message works as a search query without rewriting.
+        """
+        text = text.rstrip("?!。.~ ")
+        return len(text) <= RULE_MAX_LENGTH and not CLAUSE_SEPARATOR_PATTERN.search(text)
+
+    def _prediction(self, probability: float, source: str) -> Prediction:
+        return Prediction(
+            needs_search=probability >= 0.5,
+            probability=probability,
+            confident=probability >= self.threshold or probability <= 1 - self.threshold,
+            source=source,
+        )
+
+    def decision(self, question: str, prediction: Prediction) -> Dict[str, Any]:
+        """
+        Build an analysis decision from a confident prediction, searching for the user message as is.
+
+        Args:
+            question (str): The latest user message.
+            prediction (Prediction): The prediction.
+
+        Returns:
+            Dict[str, Any]: The decision, in the format of ANALYZE_SEARCH_PROMPT.
+        """
+        self.metrics["fast_path"] += 1
+        return {
+            "needs_search": prediction.needs_search,
+            "search_queries": [question.strip()] if prediction.needs_search else [],
+            "reason": f"classifier ({prediction.source}, p={prediction.probability:.2f})",
+        }
+
+    def should_shadow(self) -> bool:
+        return self.shadow_rate > 0 and random.random() < self.shadow_rate
+
+    def record(self, prediction: Prediction, result: Dict[str, Any]):
+        """
+        Compare a prediction with the LLM decision and log the agreement rates.
+
+        Args:
+            prediction (Prediction): The prediction.
+            result (Dict[str, Any]): The LLM decision.
+        """
+        if "needs_search" not in result:
+            return
+        agreed = prediction.needs_search == bool(result["needs_search"])
+        self.metrics["compared"] += 1
+        self.metrics["agreed"] += agreed
+        if prediction.confident:
+            self.metrics["confident_compared"] += 1
+            self.metrics["confident_agreed"] += agreed
+        else:
+            self.metrics["fallback"] += 1
+
+        if not agreed and prediction.confident:
+            logger.warning(f"分类器与 LLM 判断不一致: {prediction}, {result}")
+        if self.metrics["compared"] % 100 == 0:
+            logger.info(f"分类器一致率: {self.stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the fast path counters and the agreement rates with the LLM.
+
+        Returns:
+            Dict[str, Any]: The metrics.
+        """
+        metrics = self.metrics
+        return {
+            **metrics,
+            "agreement": metrics["agreed"] / metrics["compared"] if metrics["compared"] else None,
+            "confident_agreement": (
+                metrics["confident_agreed"] / metrics["confident_compared"] if metrics["confident_compared"] else None
+            ),
+        }
+
+
+class DecisionLog:
+    def __init__(self, path: str):
+        """
+        Append-only JSON lines log of analysis decisions, the input of the offline classifier evaluation.
+
+        Args:
+            path (str): The log file path.
+        """
+        self.path = path
+        self._lock = asyncio.Lock()
+
+    def _append(self, line: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def append(self, question: str, result: Dict[str, Any], source: str, prediction: Optional[Prediction]):
+        """
+        Log one decision.
+
+        Args:
+            question (str): The latest user message.
+            result (Dict[str, Any]): The decision.
+            source (str): Who made the decision: llm, rules or model.
+            prediction (Optional[Prediction]): The classifier prediction, if any.
+        """
+        record = {
+            "question": question,
+            "needs_search": result.get("needs_search"),
+            "search_queries": result.get("search_queries", []),
+            "source": source,
+            "probability": prediction.probability if prediction is not None else None,
+        }
+        async with self._lock:
+            await asyncio.to_thread(self._append, json.dumps(record, ensure_ascii=False))
+
+
+def read_decision_log(path: str, source: Optional[str] = "llm") -> List[Dict[str, Any]]:
+    """
+    Read logged decisions.
+
+    Args:
+        path (str): The log file path.
+        source (Optional[str], optional): Keep only decisions of this source. Defaults to llm, the labels.
+
+    Returns:
+        List[Dict[str, Any]]: The decisions.
+    """
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("needs_search") is None or (source and record.get("source") != source):
+                continue
+            records.append(record)
+    return records
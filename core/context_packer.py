@@ -0,0 +1,107 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from schemas.search_result import SearchResult
+from utils.tokens import count_tokens, truncate_tokens
+
+
+def format_search_result(index: int, result: SearchResult) -> str:
+    return f"[webpage {index} begin]...[webpage {index} end]{result.model_dump_json()}"
+
+
+def format_search_results(results: List[SearchResult]) -> str:
+    """
+    Serialize search results for GENERATE_ANSWER_WITH_SEARCH_PROMPT.
+
+    Args:
+        results (List[SearchResult]): The search results.
+
+    Returns:
+        str: The serialized search results, one webpage per line.
+    """
+    return "\n".join(format_search_result(i, result) for i, result in enumerate(results, 1))
+
+
+class PackedContext(BaseModel):
+    results: List[SearchResult]
+    dropped: List[SearchResult]
+    truncated: List[str]
+    tokens: int
+
+
+class ContextPacker:
+    def __init__(self, token_budget: int, min_source_tokens: int = 200, max_source_tokens: Optional[int] = None):
+        """
+        Fit search results into the answer model's token budget.
+
+        Args:
+            token_budget (int): The total number of tokens available for the serialized search results.
+            min_source_tokens (int, optional): The smallest content share worth keeping a source for; the
+                lowest-ranked sources are dropped until every kept source can get it. Defaults to 200.
+            max_source_tokens (Optional[int], optional): The content cap of a single source. Defaults to None.
+        """
+        self.token_budget = token_budget
+        self.min_source_tokens = min_source_tokens
+        self.max_source_tokens = max_source_tokens
+
+    @staticmethod
+    def _allocate(needs: List[int], available: int) -> List[int]:
+        """
+        Split the available tokens fairly: small sources get all they need, the rest share what is left equally.
+
+        Args:
+            needs (List[int]): The content tokens of each source.
+            available (int): The tokens available for content.
+
+        Returns:
+            List[int]: The tokens allocated to each source.
+        """
+        allocation = [0] * len(needs)
+        remaining = available
+        order = sorted(range(len(needs)), key=lambda i: needs[i])
+        for position, index in enumerate(order):
+            share = remaining // (len(order) - position)
+            allocation[index] = min(needs[index], share)
+            remaining -= allocation[index]
+        return allocation
+
+    def pack(self, results: List[SearchResult]) -> PackedContext:
+        """
+        Keep the best-ranked search results and trim their contents to fit the token budget.
+
+        Args:
+            results (List[SearchResult]): The search results, best-ranked first.
+
+        Returns:
+            PackedContext: The kept and possibly truncated results, the dropped results, the sources that were
+                truncated and the tokens used.
+        """
+        overheads = [
+            count_tokens(format_search_result(i, result.model_copy(update={"content": ""})))
+            for i, result in enumerate(results, 1)
+        ]
+
+        kept = len(results)
+        while kept and sum(overheads[:kept]) + kept * self.min_source_tokens > self.token_budget:
+            kept -= 1
+
+        needs = [count_tokens(result.content) for result in results[:kept]]
+        if self.max_source_tokens:
+            needs = [min(need, self.max_source_tokens) for need in needs]
+        allocation = self._allocate(needs, self.token_budget - sum(overheads[:kept]))
+
+        packed_results, truncated = [], []
+        for result, tokens in zip(results[:kept], allocation):
+            content = truncate_tokens(result.content, tokens)
+            if content != result.content:
+                truncated.append(result.source)
+                result = result.model_copy(update={"content": content})
+            packed_results.append(result)
+
+        return PackedContext(
+            results=packed_results,
+            dropped=results[kept:],
+            truncated=truncated,
+            tokens=sum(overheads[:kept]) + sum(allocation),
+        )
@@ -0,0 +1,12 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class FilteredResult(BaseModel):
+    id: int
+    content: str
+
+
+class FilteredResults(BaseModel):
+    results: List[FilteredResult]
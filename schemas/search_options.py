@@ -0,0 +1,13 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class SearchOptions(BaseModel):
+    needs_crawler: Optional[bool] = None
+    needs_filter: Optional[bool] = None
+    filter_mode: Optional[Literal["single", "batch"]] = None
+    count: int = 10
+    freshness: Optional[str] = None
+    search_deadline: Optional[float] = None
+    crawl_deadline: Optional[float] = None
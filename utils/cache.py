@@ -0,0 +1,149 @@
+import asyncio
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class Cache(ABC):
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, int]: The hit, miss and eviction counters.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+
+class MemoryCache(Cache):
+    def __init__(self, max_size: int = 1024, ttl: float = 600):
+        self._items: OrderedDict = OrderedDict()
+        super().__init__(max_size, ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value and mark it as most recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None if it is missing or expired.
+        """
+        item = self._items.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._items[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting the least recently used entries beyond the size limit.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value to store.
+            ttl (Optional[float], optional): The time to live in seconds. Defaults to the cache ttl.
+        """
+        self._items[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+
+class SQLiteCache(Cache):
+    def __init__(self, path: str, max_size: int = 100000, ttl: float = 600):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        self._connection.commit()
+        self._lock = asyncio.Lock()
+        super().__init__(max_size, ttl)
+
+    def _get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        row = self._connection.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._connection.commit()
+            self.evictions += 1
+            return None
+
+        self._connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self._connection.commit()
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+        )
+        overflow = self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_size
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (overflow,)
+            )
+            self.evictions += overflow
+        self._connection.commit()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value and refresh its access time.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None if it is missing or expired.
+        """
+        async with self._lock:
+            value = await asyncio.to_thread(self._get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a JSON-serializable value, evicting the least recently used entries beyond the size limit.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value to store.
+            ttl (Optional[float], optional): The time to live in seconds. Defaults to the cache ttl.
+        """
+        async with self._lock:
+            await asyncio.to_thread(self._set, key, value, self.ttl if ttl is None else ttl)
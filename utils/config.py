@@ -14,11 +14,65 @@ class Settings(BaseSettings):
     ANSWER_LLM_BASE_URL: str
     ANSWER_LLM_MODEL: str
     ANSWER_LLM_TEMPERATURE: float
+    ANSWER_CONTEXT_TOKEN_BUDGET: int = 24000
+    ANSWER_MIN_SOURCE_TOKENS: int = 200
+    ANSWER_FALLBACK_LLM_API_KEY: str = ""
+    ANSWER_FALLBACK_LLM_BASE_URL: str = ""
+    ANSWER_FALLBACK_LLM_MODEL: str = ""
+    ANSWER_FALLBACK_LLM_IS_REASONING: bool = False
+    ANSWER_LLM_HEDGE_DELAY: float = 3
+
+    LLM_MAX_IN_FLIGHT: int = 16
+    LLM_REQUESTS_PER_MINUTE: float = 0
+    LLM_TOKENS_PER_MINUTE: float = 0
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 20
+    LLM_CALL_DEADLINE: float = 120
 
     # search
     BOCHA_API_KEY: str
     BOCHA_NEEDS_CRAWLER: bool = False
     BOCHA_NEEDS_FILTER: bool = False
+    BOCHA_TIMEOUT: float = 30
+    SEARCH_BACKEND: str = "bocha"
+    BING_MAX_PAGES: int = 5
+    SEARCH_MAX_CONCURRENT: int = 8
+    SEARCH_TIMEOUT: float = 15
+    SEARCH_DEADLINE: float = 20
+    CRAWL_DEADLINE: float = 30
+    PASSAGE_TOKEN_BUDGET: int = 1000
+    FILTER_BATCH_SIZE: int = 8
+    FILTER_BATCH_TOKEN_BUDGET: int = 6000
+    FILTER_BATCH_LINGER: float = 0.5
+    SPECULATIVE_ANSWER: bool = False
+    SPECULATIVE_SEARCH: bool = False
+    SEARCH_CACHE_SIZE: int = 1024
+    SEARCH_CACHE_TTL: float = 600
+    SEARCH_CACHE_PATH: str = ""
+    PAGE_CACHE_SIZE: int = 10000
+    PAGE_CACHE_TTL: float = 3600
+    PAGE_CACHE_MAX_AGE: float = 604800
+    PAGE_CACHE_PATH: str = ""
+    DOCUMENT_MAX_BYTES: int = 10485760
+    PDF_MAX_PAGES: int = 30
+
+    # analysis
+    ANALYSIS_CACHE_SIZE: int = 1024
+    ANALYSIS_CACHE_TTL: float = 3600
+    ANALYSIS_CACHE_SIMILARITY: float = 0
+    ANALYSIS_CLASSIFIER_ENABLED: bool = False
+    ANALYSIS_CLASSIFIER_MODEL_PATH: str = ""
+    ANALYSIS_CLASSIFIER_THRESHOLD: float = 0.9
+    ANALYSIS_CLASSIFIER_SHADOW_RATE: float = 0.05
+    ANALYSIS_DECISION_LOG_PATH: str = ""
+
+    # http
+    HTTP_POOL_SIZE: int = 100
+    HTTP_POOL_SIZE_PER_HOST: int = 20
+
+    # workers
+    CPU_WORKERS: int = -1
 
     # log
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,143 @@
+import random
+import re
+import zlib
+from typing import Collection, Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from schemas.search_result import SearchResult
+
+TRACKING_PARAMS = {"spm", "from", "source", "ref", "gclid", "fbclid", "share_token", "utm_id"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so that trivially different links to the same page compare equal.
+
+    Args:
+        url (str): The URL to normalize.
+
+    Returns:
+        str: The normalized URL, without scheme, fragment, default ports, tracking parameters or trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("", host, path, urlencode(sorted(query)), ""))
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """
+    Build the set of character shingles of a text after whitespace normalization.
+
+    Args:
+        text (str): The text to shingle.
+        size (int, optional): The shingle length in characters. Defaults to 5.
+
+    Returns:
+        Set[str]: The shingles, empty if the text is shorter than one shingle.
+    """
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1)) for _ in range(num_perm)
+        ]
+
+    def signature(self, features: Set[str]) -> Optional[List[int]]:
+        """
+        Compute the MinHash signature of a feature set.
+
+        Args:
+            features (Set[str]): The features, usually shingles.
+
+        Returns:
+            Optional[List[int]]: The signature, or None for an empty feature set.
+        """
+        if not features:
+            return None
+        hashes = [zlib.crc32(feature.encode("utf-8")) for feature in features]
+        return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self.permutations]
+
+    @staticmethod
+    def similarity(left: List[int], right: List[int]) -> float:
+        """
+        Estimate the Jaccard similarity of two signatures.
+
+        Args:
+            left (List[int]): The first signature.
+            right (List[int]): The second signature.
+
+        Returns:
+            float: The estimated similarity between 0 and 1.
+        """
+        return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+def merge_search_results(
+    results_by_query: Dict[str, List[SearchResult]],
+    similarity_threshold: float = 0.8,
+    shingle_size: int = 5,
+    secondary_queries: Collection[str] = (),
+) -> Dict[str, List[SearchResult]]:
+    """
+    Deduplicate search results across queries by normalized URL and near-duplicate content.
+
+    Results are visited by rank, then by query order, so the best-ranked occurrence of a page is the one kept.
+    Results of secondary queries are only visited after all the others, so they never displace them.
+
+    Args:
+        results_by_query (Dict[str, List[SearchResult]]): The search results of each query, in query order.
+        similarity_threshold (float, optional): The MinHash similarity above which contents are duplicates.
+            Defaults to 0.8.
+        shingle_size (int, optional): The shingle length in characters. Defaults to 5.
+        secondary_queries (Collection[str], optional): The queries whose results rank after all others.
+            Defaults to ().
+
+    Returns:
+        Dict[str, List[SearchResult]]: The kept results of each query, in their original order.
+    """
+    hasher = MinHasher()
+    candidates = sorted(
+        (query in secondary_queries, rank, query_index, query, result)
+        for query_index, (query, results) in enumerate(results_by_query.items())
+        for rank, result in enumerate(results)
+    )
+
+    seen_urls = set()
+    signatures = []
+    kept = set()
+    for _, rank, query_index, query, result in candidates:
+        url = normalize_url(result.source)
+        if url in seen_urls:
+            continue
+
+        signature = hasher.signature(shingles(result.content, shingle_size))
+        if signature and any(hasher.similarity(signature, other) >= similarity_threshold for other in signatures):
+            continue
+
+        seen_urls.add(url)
+        if signature:
+            signatures.append(signature)
+        kept.add((query_index, rank))
+
+    return {
+        query: [result for rank, result in enumerate(results) if (query_index, rank) in kept]
+        for query_index, (query, results) in enumerate(results_by_query.items())
+    }
@@ -0,0 +1,128 @@
+import codecs
+import io
+import json
+import posixpath
+import re
+from typing import Optional
+from urllib.parse import urlsplit
+
+from pypdf import PdfReader
+
+from .workers import html_to_text
+
+DOCUMENT_TYPES = {
+    "text/html": "html",
+    "application/xhtml+xml": "html",
+    "application/pdf": "pdf",
+    "application/x-pdf": "pdf",
+    "text/plain": "text",
+    "text/markdown": "text",
+    "text/csv": "text",
+    "application/json": "json",
+}
+DOCUMENT_EXTENSIONS = {
+    ".html": "html",
+    ".htm": "html",
+    ".pdf": "pdf",
+    ".txt": "text",
+    ".md": "text",
+    ".csv": "text",
+    ".json": "json",
+}
+
+META_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+def document_type(content_type: str, url: str) -> Optional[str]:
+    """
+    Determine how to extract the text of a document from its content type, or its URL extension when the server
+    sends a generic one.
+
+    Args:
+        content_type (str): The Content-Type header.
+        url (str): The document URL.
+
+    Returns:
+        Optional[str]: html, pdf, text or json, or None if the document type is not supported.
+    """
+    mime_type = content_type.split(";")[0].strip().lower()
+    if mime_type in DOCUMENT_TYPES:
+        return DOCUMENT_TYPES[mime_type]
+    if mime_type.endswith("+json"):
+        return "json"
+    if mime_type and mime_type not in ("application/octet-stream", "binary/octet-stream"):
+        return None
+
+    extension = posixpath.splitext(urlsplit(url).path.lower())[1]
+    return DOCUMENT_EXTENSIONS.get(extension, None if mime_type else "html")
+
+
+def decode_text(data: bytes, charset: Optional[str] = None) -> str:
+    """
+    Decode a text document with the charset of its Content-Type header, or the one declared in its HTML head.
+
+    Args:
+        data (bytes): The document.
+        charset (Optional[str], optional): The charset of the Content-Type header. Defaults to None.
+
+    Returns:
+        str: The decoded text, with undecodable bytes replaced.
+    """
+    if not charset:
+        match = META_CHARSET_PATTERN.search(data[:4096])
+        charset = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = "utf-8"
+    return data.decode(charset, errors="replace")
+
+
+def pdf_to_text(data: bytes, max_pages: int = 30) -> str:
+    """
+    Extract the text of a PDF page by page, stopping after max_pages. Runs inside the worker processes.
+
+    Args:
+        data (bytes): The PDF.
+        max_pages (int, optional): The maximum number of pages to extract. Defaults to 30.
+
+    Returns:
+        str: The cleaned text, empty for scanned or unreadable PDFs.
+    """
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    for index, page in enumerate(reader.pages):
+        if index >= max_pages:
+            break
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception:
+            continue
+    return " ".join(" ".join(pages).split())
+
+
+def extract_document(kind: str, data: bytes, charset: Optional[str] = None, max_pages: int = 30) -> str:
+    """
+    Extract the text of a downloaded document according to its type. Runs inside the worker processes.
+
+    Args:
+        kind (str): The document type from document_type.
+        data (bytes): The document.
+        charset (Optional[str], optional): The charset of the Content-Type header. Defaults to None.
+        max_pages (int, optional): The maximum number of PDF pages to extract. Defaults to 30.
+
+    Returns:
+        str: The cleaned text.
+    """
+    if kind == "pdf":
+        return pdf_to_text(data, max_pages)
+
+    text = decode_text(data, charset)
+    if kind == "html":
+        return html_to_text(text)
+    if kind == "json":
+        try:
+            text = json.dumps(json.loads(text), ensure_ascii=False)
+        except ValueError:
+            pass
+    return " ".join(text.split())
@@ -0,0 +1,67 @@
+import html
+import re
+
+MARKUP_PATTERN = re.compile(
+    r"<(script|style|noscript|template|svg)\b[^>]*>.*?</\1\s*>"  # blocks whose bodies are not visible text
+    r"|<!--.*?-->"  # comments
+    r"|<[a-zA-Z/!?][^>]*>",  # any other tag, leaving bare "<" in text untouched
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def clean_html(content: str) -> str:
+    """
+    Extract visible text from HTML.
+
+    A single compiled pattern drops script, style and similar blocks together with their bodies, comments and tags
+    in one scan, then all named and numeric character references are decoded and whitespace is collapsed.
+
+    Args:
+        content (str): The HTML or partially marked-up text.
+
+    Returns:
+        str: The cleaned text.
+    """
+    if "<" in content:
+        content = MARKUP_PATTERN.sub(" ", content)
+    if "&" in content:
+        content = html.unescape(content)
+    return " ".join(content.split())
+
+
+TITLE_PATTERN = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+SCRIPT_RENDERED_PATTERN = re.compile(
+    r"<div\b[^>]*\bid=[\"']?(root|app|__next|__nuxt|main-app)[\"']?[^>]*>\s*</div>"  # empty SPA mount point
+    r"|<noscript\b[^>]*>[^<]*(enable|turn on|requires?|开启|启用|打开)[^<]*javascript"  # JavaScript required notice
+    r"|\bng-app\b|\bdata-server-rendered=[\"']?false",
+    re.IGNORECASE,
+)
+
+
+def extract_title(content: str) -> str:
+    """
+    Extract the document title from HTML.
+
+    Args:
+        content (str): The HTML.
+
+    Returns:
+        str: The title, or an empty string if there is none.
+    """
+    match = TITLE_PATTERN.search(content)
+    return clean_html(match.group(1)) if match else ""
+
+
+def needs_javascript(content: str, text: str, min_text_length: int = 200) -> bool:
+    """
+    Guess whether a page only renders its content with JavaScript.
+
+    Args:
+        content (str): The HTML as served.
+        text (str): The text extracted from it.
+        min_text_length (int, optional): The text length below which the page counts as empty. Defaults to 200.
+
+    Returns:
+        bool: True if the page has too little text or shows single-page application markers.
+    """
+    return len(text) < min_text_length or SCRIPT_RENDERED_PATTERN.search(content) is not None
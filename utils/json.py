@@ -1,57 +1,268 @@
+import bisect
 import json
 import re
-from typing import Dict, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+OPENERS = {"{": "}", "[": "]"}
+WHITESPACE = " \t\r\n"
+
+OPENER_PATTERN = re.compile(r"[{\[]")
+STRUCTURE_PATTERN = re.compile(r'[{}\[\]",]')
+STRING_END_PATTERN = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
 
 
 def parse_result_to_json(result: str) -> Union[Dict[str, any], str, None]:
     """
     解析结果字符串为JSON格式。
+    - 依次尝试文本中每个完整的 JSON 对象或数组候选，返回第一个可以解析的
 
     参数:
     - result (str): 结果字符串，可能包含JSON格式的数据。
 
     返回:
-    - Union[Dict[str, any], str, None]: 解析后的JSON数据，如果解析失败则返回字符串。
+    - Union[Dict[str, any], str, None]: 解析后的JSON数据，如果解析失败则返回 None。
     """
-    text = remove_trailing_commas(result)
-    json_data = extract_json_from_text(text)
-
-    if json_data is None:
-        return None
-
-    try:
-        parsed_json = json.loads(json_data)
-        return parsed_json
-    except json.JSONDecodeError:
-        return None
+    for json_data in iter_json_candidates(result):
+        try:
+            return json.loads(json_data)
+        except json.JSONDecodeError:
+            continue
+    return None
 
 
-def remove_trailing_commas(text: str) -> str:
+def iter_json_candidates(text: str) -> Iterator[str]:
     """
-    去除 JSON 字符串中的尾随逗号。
+    一次线性扫描文本，按出现顺序产出通过括号匹配得到的 JSON 对象或数组候选，每个字符只扫描一次。
+    - 忽略字符串内的括号和转义字符
+    - 去除字符串外的尾随逗号
+    - 最外层括号不匹配或未闭合时，产出其中已完整闭合的直接子对象或数组，并从不匹配处继续扫描
 
     参数:
     - text (str): 待处理的文本字符串。
 
     返回:
-    - str: 去除尾随逗号后的文本字符串。
+    - Iterator[str]: JSON 片段候选。
     """
-    return re.sub(r",\s*(?=\]|\})", "", text)
+    closers: List[str] = []
+    openers: List[int] = []
+    trailing_commas: List[int] = []
+    children: List[Tuple[int, int]] = []
+    comma = None
+    position = 0
+
+    def build(begin: int, end: int) -> str:
+        pieces, last = [], begin
+        for comma in trailing_commas[bisect.bisect_left(trailing_commas, begin) :]:
+            if comma >= end:
+                break
+            pieces.append(text[last:comma])
+            last = comma + 1
+        pieces.append(text[last:end])
+        return "".join(pieces)
+
+    while True:
+        if not closers:
+            match = OPENER_PATTERN.search(text, position)
+            if match is None:
+                return
+            position = match.start()
+            trailing_commas, children, comma = [], [], None
+
+        match = STRUCTURE_PATTERN.search(text, position)
+        if match is None:
+            break
+        index, char = match.start(), match.group()
+        if comma is not None and text[position:index].strip():
+            comma = None
+        position = index + 1
 
+        if char == '"':
+            match = STRING_END_PATTERN.match(text, position)
+            if match is None:
+                break
+            position = match.end()
+            comma = None
+        elif char == ",":
+            comma = index
+        elif char in OPENERS:
+            closers.append(OPENERS[char])
+            openers.append(index)
+            comma = None
+        elif char != closers[-1]:
+            for begin, end in children:
+                yield build(begin, end)
+            closers, openers, comma = [], [], None
+        else:
+            closers.pop()
+            begin = openers.pop()
+            if comma is not None:
+                trailing_commas.append(comma)
+                comma = None
+            if not closers:
+                yield build(begin, position)
+            elif len(closers) == 1:
+                children.append((begin, position))
 
-def extract_json_from_text(text: str) -> str:
+    for begin, end in children:
+        yield build(begin, end)
+
+
+def extract_json_from_text(text: str) -> Optional[str]:
     """
-    使用正则表达式提取文本中的最外层 JSON 对象或数组。
-    - 匹配 {} 或 [] 包围的部分
+    使用括号匹配提取文本中的第一个 JSON 对象或数组候选。
 
     参数:
     - text (str): 待处理的文本字符串。
 
     返回:
-    - str: 提取到的最外层 JSON 对象或数组，如果没有找到则返回 None。
+    - str: 提取到的 JSON 对象或数组，如果没有找到则返回 None。
     """
-    json_pattern = r"(\{.*\}|\[.*\])"
-    match = re.search(json_pattern, text, re.DOTALL)
-    if match:
-        return match.group(0).strip()
-    return None
+    return next(iter_json_candidates(text), None)
+
+
+class JSONStreamParser:
+    """
+    增量 JSON 解析器，逐块消费 LLM 的流式输出。
+    - 跳过第一个 { 或 [ 之前的内容（如代码块标记和说明文字）
+    - 容忍尾随逗号
+    - 每个值（字符串、数字、对象、数组等）解析完成时立即产出 (路径, 值) 事件，根值的路径为 ()
+    """
+
+    def __init__(self):
+        self.done = False
+        self.failed = False
+        self.value: Any = None
+        self._text: List[str] = []
+        self._stack: List[list] = []
+        self._string: Optional[List[str]] = None
+        self._escape = False
+        self._scalar: Optional[List[str]] = None
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[Union[str, int], ...], Any]]:
+        """
+        解析一块文本。
+
+        参数:
+        - chunk (str): 新到达的文本。
+
+        返回:
+        - List[Tuple[Tuple[Union[str, int], ...], Any]]: 本块中解析完成的值及其路径。
+        """
+        self._text.append(chunk)
+        events: List[Tuple[Tuple[Union[str, int], ...], Any]] = []
+        for char in chunk:
+            if self.done or self.failed:
+                break
+            self._consume(char, events)
+        return events
+
+    def result(self) -> Any:
+        """
+        获取完整的解析结果，流式解析失败或未完成时退回到对全文的括号匹配解析。
+
+        返回:
+        - Any: 解析后的JSON数据，如果解析失败则返回 None。
+        """
+        if self.done:
+            return self.value
+        return parse_result_to_json("".join(self._text))
+
+    def _consume(self, char: str, events: list):
+        if self._string is not None:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._end_string(events)
+                return
+            self._string.append(char)
+            return
+
+        if self._scalar is not None:
+            if char not in WHITESPACE and char not in ",]}":
+                self._scalar.append(char)
+                return
+            self._end_scalar(events)
+            if self.failed:
+                return
+
+        if not self._stack:
+            if char in OPENERS:
+                self._stack.append([{} if char == "{" else [], None, "key" if char == "{" else "value"])
+            return
+
+        frame = self._stack[-1]
+        container, _, expect = frame
+        if char in WHITESPACE:
+            return
+        if char in OPENERS:
+            if expect != "value":
+                self.failed = True
+                return
+            self._stack.append([{} if char == "{" else [], None, "key" if char == "{" else "value"])
+        elif char in "}]":
+            if isinstance(container, dict) != (char == "}"):
+                self.failed = True
+                return
+            self._stack.pop()
+            self._emit(container, events)
+        elif char == ":":
+            frame[2] = "value" if expect == "colon" else "invalid"
+        elif char == ",":
+            frame[2] = "key" if isinstance(container, dict) else "value"
+        elif char == '"':
+            self._string = []
+        elif expect == "value":
+            self._scalar = [char]
+        else:
+            self.failed = True
+
+    def _end_string(self, events: list):
+        try:
+            value = json.loads('"' + "".join(self._string) + '"')
+        except json.JSONDecodeError:
+            self.failed = True
+            return
+        finally:
+            self._string = None
+
+        frame = self._stack[-1]
+        if frame[2] == "key":
+            frame[1] = value
+            frame[2] = "colon"
+        elif frame[2] == "value":
+            self._emit(value, events)
+        else:
+            self.failed = True
+
+    def _end_scalar(self, events: list):
+        try:
+            value = json.loads("".join(self._scalar))
+        except json.JSONDecodeError:
+            self.failed = True
+            return
+        finally:
+            self._scalar = None
+        self._emit(value, events)
+
+    def _emit(self, value: Any, events: list):
+        if not self._stack:
+            self.done = True
+            self.value = value
+            events.append(((), value))
+            return
+
+        frame = self._stack[-1]
+        container = frame[0]
+        if isinstance(container, dict):
+            if frame[2] != "value":
+                self.failed = True
+                return
+            container[frame[1]] = value
+        else:
+            container.append(value)
+        path = tuple(f[1] if isinstance(f[0], dict) else len(f[0]) for f in self._stack[:-1])
+        path += (frame[1],) if isinstance(container, dict) else (len(container) - 1,)
+        frame[2] = "comma"
+        events.append((path, value))
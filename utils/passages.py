@@ -0,0 +1,131 @@
+import math
+import re
+from collections import Counter
+from typing import List
+
+from .tokens import count_tokens
+
+SENTENCE_PATTERN = re.compile(r"(?<=[。！？；!?;.])\s*|\n+")
+TERM_PATTERN = re.compile(r"[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into BM25 terms: latin words and digits as is, CJK runs as character bigrams.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The terms.
+    """
+    terms = []
+    for run in TERM_PATTERN.findall(text.lower()):
+        if run[0].isascii():
+            terms.append(run)
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def split_passages(text: str, passage_size: int = 400) -> List[str]:
+    """
+    Split text into passages of roughly passage_size characters along sentence boundaries.
+
+    Args:
+        text (str): The text to split.
+        passage_size (int, optional): The target passage length in characters. Defaults to 400.
+
+    Returns:
+        List[str]: The passages, in their original order.
+    """
+    passages, current = [], ""
+    for sentence in SENTENCE_PATTERN.split(text):
+        if not sentence:
+            continue
+        while len(sentence) > passage_size:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(sentence[:passage_size])
+            sentence = sentence[passage_size:]
+        if current and len(current) + len(sentence) > passage_size:
+            passages.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+
+def bm25_scores(query: str, passages: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Score passages against a query with Okapi BM25, using the passages themselves as the corpus.
+
+    Args:
+        query (str): The query.
+        passages (List[str]): The passages to score.
+        k1 (float, optional): The term frequency saturation. Defaults to 1.5.
+        b (float, optional): The length normalization. Defaults to 0.75.
+
+    Returns:
+        List[float]: The score of each passage.
+    """
+    query_terms = set(tokenize(query))
+    documents = [Counter(tokenize(passage)) for passage in passages]
+    if not query_terms or not documents:
+        return [0.0] * len(passages)
+
+    average_length = sum(sum(document.values()) for document in documents) / len(documents) or 1
+    idf = {}
+    for term in query_terms:
+        frequency = sum(1 for document in documents if term in document)
+        idf[term] = math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+
+    scores = []
+    for document in documents:
+        length = sum(document.values())
+        score = 0.0
+        for term in query_terms:
+            tf = document.get(term, 0)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
+
+
+def select_passages(text: str, query: str, token_budget: int = 1000, passage_size: int = 400) -> str:
+    """
+    Keep the passages of a long text most relevant to the query within a token budget.
+
+    The first passage, which holds the search engine summary, is always kept; the others are added by
+    descending BM25 score until the budget is spent and are returned in their original order.
+
+    Args:
+        text (str): The text to shorten.
+        query (str): The query the passages are scored against.
+        token_budget (int, optional): The maximum number of tokens to keep. Defaults to 1000.
+        passage_size (int, optional): The target passage length in characters. Defaults to 400.
+
+    Returns:
+        str: The selected passages, or the text unchanged if it already fits the budget.
+    """
+    if count_tokens(text) <= token_budget:
+        return text
+
+    passages = split_passages(text, passage_size)
+    tokens = [count_tokens(passage) for passage in passages]
+    scores = bm25_scores(query, passages)
+
+    selected = {0}
+    used = tokens[0]
+    for index in sorted(range(1, len(passages)), key=lambda i: scores[i], reverse=True):
+        if scores[index] <= 0:
+            break
+        if used + tokens[index] <= token_budget:
+            selected.add(index)
+            used += tokens[index]
+
+    return "\n".join(passages[index] for index in sorted(selected))
@@ -0,0 +1,57 @@
+import math
+import re
+import unicodedata
+import zlib
+from typing import Dict, Iterable
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for matching: NFKC, lower case and collapsed whitespace.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The normalized text.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+def hashed_ngrams(text: str, ngram_sizes: Iterable[int] = (2, 3), dims: int = 1 << 18) -> Dict[int, float]:
+    """
+    Embed text as an L2-normalized sparse vector of hashed character n-gram counts.
+
+    Args:
+        text (str): The text to embed.
+        ngram_sizes (Iterable[int], optional): The character n-gram sizes. Defaults to (2, 3).
+        dims (int, optional): The number of hash buckets. Defaults to 2**18.
+
+    Returns:
+        Dict[int, float]: The sparse vector, empty if the text has no n-grams.
+    """
+    text = normalize_text(text)
+    vector: Dict[int, float] = {}
+    for size in ngram_sizes:
+        for i in range(len(text) - size + 1):
+            index = zlib.crc32(text[i : i + size].encode("utf-8")) % dims
+            vector[index] = vector.get(index, 0.0) + 1.0
+
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {index: value / norm for index, value in vector.items()} if norm else {}
+
+
+def cosine(left: Dict[int, float], right: Dict[int, float]) -> float:
+    """
+    Cosine similarity of two L2-normalized sparse vectors.
+
+    Args:
+        left (Dict[int, float]): The first vector.
+        right (Dict[int, float]): The second vector.
+
+    Returns:
+        float: The similarity.
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(value * right.get(index, 0.0) for index, value in left.items())
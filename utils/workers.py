@@ -0,0 +1,74 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from langchain_community.document_transformers import Html2TextTransformer
+from langchain_core.documents import Document
+
+from .config import settings
+from .html import clean_html
+from .logger import logger
+
+
+def html_to_text(html: str) -> str:
+    """
+    Convert an HTML page to cleaned plain text. Runs inside the worker processes.
+
+    Args:
+        html (str): The HTML page.
+
+    Returns:
+        str: The cleaned text.
+    """
+    docs = Html2TextTransformer().transform_documents([Document(page_content=html)])
+    return clean_html(docs[0].page_content)
+
+
+class CPUWorkerPool:
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Lazily started process pool for CPU-bound work that would otherwise stall the event loop.
+
+        Args:
+            max_workers (Optional[int], optional): The number of worker processes, 0 to run jobs in a thread
+                instead. Defaults to the number of cores.
+        """
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a picklable top-level function in the pool.
+
+        Args:
+            func (Callable[..., Any]): The function to run.
+            *args (Any): The arguments to pass.
+
+        Returns:
+            Any: The function result.
+        """
+        if self.max_workers <= 0:
+            return await asyncio.to_thread(func, *args)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        except BrokenProcessPool:
+            logger.error("CPU 进程池异常退出，已重建")
+            self.shutdown()
+            return await asyncio.to_thread(func, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+cpu_pool = CPUWorkerPool(settings.CPU_WORKERS if settings.CPU_WORKERS >= 0 else None)
@@ -14,7 +14,7 @@ def initialize_session_state():
         st.session_state.history = []
 
 
-async def handle_query(question: str, needs_crawler: bool, needs_filter: bool):
+async def handle_query(question: str, needs_crawler: bool, needs_filter: bool, filter_mode: str):
     st.session_state.messages.append(ChatMessage(role="user", content=question))
     st.session_state.history.append({"role": "user", "content": question})
 
@@ -28,6 +28,7 @@ async def handle_query(question: str, needs_crawler: bool, needs_filter: bool):
         "messages": [msg.model_dump() for msg in st.session_state.messages],
         "needs_crawler": needs_crawler,
         "needs_filter": needs_filter,
+        "filter_mode": filter_mode,
     }
     async with aiohttp.ClientSession() as client:
         async with client.post("http://localhost:8000/api/v1/chat", json=data, timeout=None) as response:
@@ -70,7 +71,8 @@ async def handle_query(question: str, needs_crawler: bool, needs_filter: bool):
 def config_search_tool():
     needs_crawler = st.sidebar.checkbox("开启爬取源网页", value=False)
     needs_filter = st.sidebar.checkbox("开启过滤和总结", value=False)
-    return needs_crawler, needs_filter
+    batch_filter = st.sidebar.checkbox("批量过滤", value=False, disabled=not needs_filter)
+    return needs_crawler, needs_filter, "batch" if batch_filter else "single"
 
 
 def clean_history():
@@ -97,7 +99,7 @@ def display_chat_history():
 st.set_page_config(page_title="Chat with LLM", layout="wide")
 st.title("Chat with LLM")
 
-needs_crawler, needs_filter = config_search_tool()
+needs_crawler, needs_filter, filter_mode = config_search_tool()
 
 initialize_session_state()
 
@@ -118,4 +120,4 @@ user_input = st.chat_input("请输入您的问题")
 if user_input:
     input_placeholder.markdown(user_input)
     with st.spinner("正在处理..."):
-        asyncio.run(handle_query(user_input, needs_crawler, needs_filter))
+        asyncio.run(handle_query(user_input, needs_crawler, needs_filter, filter_mode))